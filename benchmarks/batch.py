@@ -0,0 +1,69 @@
+"""
+Compares scoring a conversation log against intent matchers with nested
+loops and with the batch similarity matrix. Run it with:
+
+    PYTHONPATH=src python benchmarks/batch.py
+"""
+import string
+from random import (
+    Random,
+)
+from timeit import (
+    timeit,
+)
+
+from iron_throne.batch import (
+    np,
+    py_similarity_matrix,
+    similarity_matrix,
+)
+from iron_throne.trigram import (
+    Matcher,
+    Trigram,
+)
+
+random = Random(42)
+
+MATCHERS = 50
+PATTERNS = 20
+MESSAGES = 2000
+
+
+def make_text(length):
+    letters = string.ascii_lowercase + ' '
+    return ''.join(random.choice(letters) for _ in range(0, length))
+
+
+def main():
+    matchers = [
+        Matcher([
+            (Trigram(make_text(12)), Trigram(make_text(12)))
+            for _ in range(0, PATTERNS)
+        ])
+        for _ in range(0, MATCHERS)
+    ]
+    messages = [Trigram(make_text(40)) for _ in range(0, MESSAGES)]
+
+    for t in messages:
+        assert t.codes
+
+    def loops():
+        py_similarity_matrix(messages, matchers)
+
+    def matrix():
+        similarity_matrix(messages, matchers)
+
+    candidates = [('nested loops', loops)]
+
+    if np is not None:
+        candidates.append(('matrix', matrix))
+
+    for name, f in candidates:
+        duration = timeit(f, number=1)
+        pairs = MESSAGES * MATCHERS
+        print(f'{name:<16} {duration * 1000:8.1f} ms '
+              f'({duration / pairs * 1e6:.2f} µs/pair)')
+
+
+if __name__ == '__main__':
+    main()
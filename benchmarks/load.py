@@ -0,0 +1,409 @@
+"""
+Load test: replays messages through an `IronThrone` from several workers
+and reports throughput, latency percentiles, CPU and RSS over time. Run it
+with:
+
+    PYTHONPATH=src python benchmarks/load.py --mode thread --concurrency 4
+
+Messages are generated from a small synthetic catalog, or from the La Poste
+cities file (`--cities tests/issue_0002/assets/cities_france.json`), or read
+from a file with one message per line (`--corpus messages.txt`).
+
+Modes:
+
+- `thread`: a thread pool shares one `IronThrone`
+- `process`: each process of a pool builds its own `IronThrone`
+- `async`: an asyncio loop sends the requests to a thread pool
+
+By default requests are sent as fast as the workers take them, with at most
+`--concurrency` requests in flight. With `--rate`, requests are sent at a
+fixed rate instead, and latencies are counted from the time each request
+should have been sent, so that queueing shows in the latency.
+
+CPU and RSS are read from /proc (for this process and its children), which
+is Linux-only.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from itertools import (
+    cycle,
+    islice,
+)
+from random import (
+    Random,
+)
+from threading import (
+    Event,
+    Lock,
+    Semaphore,
+    Thread,
+)
+from time import (
+    monotonic,
+    sleep,
+)
+from typing import (
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Tuple,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+
+random = Random(42)
+
+FOODS = ['potato salad', 'cheese', 'ham', 'red wine', 'chocolate cake']
+ANIMALS = ['turtle', 'fox', 'elephant', 'red panda']
+CITIES = ['la rochelle', 'paris', 'saint malo', 'lyon', 'aix en provence']
+
+TEMPLATES = [
+    'I would like some {food} please',
+    'is there a {animal} in {city}',
+    'we are going to {city} tomorrow to eat {food}',
+    'my {animal} loves {food}',
+    'hello',
+]
+
+# Throne of the current process, see `init_worker()`
+THRONE: Optional[IronThrone] = None
+
+
+def city_names(path: Text) -> List[Text]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return sorted(set(
+            city['fields']['nom_de_la_commune']
+            for city in json.load(f)
+            if 'nom_de_la_commune' in city.get('fields', {})
+        ))
+
+
+def make_throne(cities: Optional[Text], budget: Optional[float]) \
+        -> IronThrone:
+    expressions = [Expression(f, 'food', f) for f in FOODS]
+    expressions += [Expression(a, 'animal', a) for a in ANIMALS]
+    names = city_names(cities) if cities else CITIES
+    expressions += [Expression(c, 'city', c) for c in names]
+
+    return IronThrone([
+        ExpressionPretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ], time_budget=budget)
+
+
+def make_messages(corpus: Optional[Text],
+                  cities: Optional[Text],
+                  count: int) -> List[Text]:
+    if corpus:
+        with open(corpus, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    names = city_names(cities) if cities else CITIES
+
+    return [
+        random.choice(TEMPLATES).format(
+            food=random.choice(FOODS),
+            animal=random.choice(ANIMALS),
+            city=random.choice(names),
+        )
+        for _ in range(0, count)
+    ]
+
+
+def init_worker(cities: Optional[Text], budget: Optional[float]) -> None:
+    global THRONE
+    THRONE = make_throne(cities, budget)
+
+
+def handle(text: Text) -> bool:
+    """
+    Processes one message and tells if it ran out of budget.
+    """
+
+    return THRONE.get_result(text).exhausted
+
+
+def process_usage(pid: int) -> Tuple[float, int]:
+    """
+    CPU time (in seconds) and RSS (in bytes) of a process.
+    """
+
+    with open(f'/proc/{pid}/stat', 'r') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+
+    with open(f'/proc/{pid}/statm', 'r') as f:
+        rss = int(f.read().split()[1])
+
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    return cpu, rss * os.sysconf('SC_PAGE_SIZE')
+
+
+def children(pid: int) -> List[int]:
+    out = []
+
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+
+        if ppid == pid:
+            out.append(int(entry))
+
+    return out
+
+
+def usage() -> Tuple[float, int]:
+    """
+    CPU time and RSS of this process and its children.
+    """
+
+    cpu, rss = .0, 0
+
+    for pid in [os.getpid()] + children(os.getpid()):
+        try:
+            c, r = process_usage(pid)
+        except OSError:
+            continue
+
+        cpu += c
+        rss += r
+
+    return cpu, rss
+
+
+class Sampler(Thread):
+    """
+    Samples the CPU usage (in % of one core) and RSS every `interval`
+    seconds.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = Event()
+        self.samples: List[Tuple[float, float, int]] = []
+
+    def run(self) -> None:
+        start = monotonic()
+        last_time = start
+        last_cpu, _ = usage()
+
+        while not self.stopped.wait(self.interval):
+            now = monotonic()
+            cpu, rss = usage()
+            percent = (cpu - last_cpu) / (now - last_time) * 100.
+            self.samples.append((now - start, percent, rss))
+            last_time, last_cpu = now, cpu
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+class Recorder(object):
+    def __init__(self):
+        self.lock = Lock()
+        self.latencies: List[float] = []
+        self.exhausted = 0
+        self.errors = 0
+
+    def record(self, scheduled: float, future: Future) -> None:
+        latency = monotonic() - scheduled
+
+        with self.lock:
+            if future.exception() is not None:
+                self.errors += 1
+                return
+
+            self.latencies.append(latency)
+            self.exhausted += int(future.result())
+
+
+def schedule(messages: List[Text],
+             count: int,
+             duration: Optional[float],
+             rate: Optional[float]) -> Iterator[Tuple[Optional[float], Text]]:
+    """
+    Yields (time at which the request must be sent, message). Without rate,
+    requests are sent as soon as possible and the time is `None`. With a
+    duration, messages are repeated until the time is up.
+    """
+
+    start = monotonic()
+    messages = cycle(messages) if duration else islice(messages, count)
+
+    for i, text in enumerate(messages):
+        if duration is not None and monotonic() - start > duration:
+            break
+
+        yield (start + i / rate if rate else None), text
+
+
+def run_executor(executor: Executor,
+                 func: Callable[[Text], bool],
+                 requests: Iterator[Tuple[Optional[float], Text]],
+                 concurrency: int,
+                 recorder: Recorder) -> None:
+    in_flight = Semaphore(concurrency)
+    futures = []
+
+    def done(scheduled: float, future: Future) -> None:
+        recorder.record(scheduled, future)
+        in_flight.release()
+
+    for scheduled, text in requests:
+        if scheduled is not None:
+            sleep(max(.0, scheduled - monotonic()))
+
+        in_flight.acquire()
+
+        if scheduled is None:
+            scheduled = monotonic()
+
+        future = executor.submit(func, text)
+        future.add_done_callback(lambda f, s=scheduled: done(s, f))
+        futures.append(future)
+
+    for future in futures:
+        future.exception()
+
+
+async def run_async(executor: Executor,
+                    func: Callable[[Text], bool],
+                    requests: Iterator[Tuple[Optional[float], Text]],
+                    concurrency: int,
+                    recorder: Recorder) -> None:
+    loop = asyncio.get_running_loop()
+    in_flight = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def one(scheduled: float, text: Text) -> None:
+        future = loop.run_in_executor(executor, func, text)
+
+        try:
+            await future
+        except Exception:
+            pass
+
+        recorder.record(scheduled, future)
+        in_flight.release()
+
+    for scheduled, text in requests:
+        if scheduled is not None:
+            await asyncio.sleep(max(.0, scheduled - monotonic()))
+
+        await in_flight.acquire()
+
+        if scheduled is None:
+            scheduled = monotonic()
+
+        tasks.append(asyncio.create_task(one(scheduled, text)))
+
+    await asyncio.gather(*tasks)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return .0
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=['thread', 'process', 'async'],
+                        default='thread')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=None,
+                        help='requests per second (default: unbounded)')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=None,
+                        help='stop after that many seconds')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='time budget of each request, in seconds')
+    parser.add_argument('--corpus', default=None)
+    parser.add_argument('--cities', default=None)
+    parser.add_argument('--interval', type=float, default=1.)
+    args = parser.parse_args()
+
+    messages = make_messages(args.corpus, args.cities, args.messages)
+    recorder = Recorder()
+
+    if args.mode == 'process':
+        executor = ProcessPoolExecutor(
+            args.concurrency,
+            initializer=init_worker,
+            initargs=(args.cities, args.budget),
+        )
+        # Starts the workers before measuring
+        list(executor.map(abs, range(0, args.concurrency)))
+    else:
+        init_worker(args.cities, args.budget)
+        executor = ThreadPoolExecutor(args.concurrency)
+
+    sampler = Sampler(args.interval)
+    sampler.start()
+    start = monotonic()
+    requests = schedule(messages, args.messages, args.duration, args.rate)
+
+    with executor:
+        if args.mode == 'async':
+            asyncio.run(run_async(
+                executor, handle, requests, args.concurrency, recorder,
+            ))
+        else:
+            run_executor(
+                executor, handle, requests, args.concurrency, recorder,
+            )
+
+    elapsed = monotonic() - start
+    sampler.stop()
+    latencies = recorder.latencies
+
+    print(f'{len(latencies)} requests in {elapsed:.2f}s '
+          f'({len(latencies) / elapsed:.1f} req/s), '
+          f'{recorder.exhausted} out of budget, {recorder.errors} errors')
+    print('latency     ' + '  '.join(
+        f'{name} {percentile(latencies, p) * 1000:.1f} ms'
+        for name, p in [('p50', .5), ('p95', .95), ('p99', .99), ('max', 1.)]
+    ))
+    print()
+    print(f'{"time":>8} {"cpu":>8} {"rss":>10}')
+
+    for t, cpu, rss in sampler.samples:
+        print(f'{t:>7.1f}s {cpu:>7.1f}% {rss / 2 ** 20:>7.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares the trigram path (`ExpressionPretender`) and the deletion index path
+(`ShortWordPretender`) on short words with a typo, for each word length. Run
+it with:
+
+    PYTHONPATH=src python benchmarks/short_words.py
+"""
+import string
+from random import (
+    Random,
+)
+from timeit import (
+    timeit,
+)
+from typing import (
+    List,
+    Text,
+)
+
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    ShortWordPretender,
+)
+from iron_throne.words import (
+    Word,
+)
+
+random = Random(42)
+
+EXPRESSIONS = 20000
+QUERIES = 2000
+
+
+def make_word(min_length: int, max_length: int) -> Text:
+    length = random.randint(min_length, max_length)
+    letters = string.ascii_lowercase
+    return ''.join(random.choice(letters) for _ in range(0, length))
+
+
+def typo(word: Text) -> Text:
+    i = random.randrange(0, len(word))
+    return word[:i] + random.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def make_expressions() -> List[Expression]:
+    short = [make_word(2, 3) for _ in range(0, 500)]
+    long = [make_word(4, 10) for _ in range(0, 5000)]
+
+    def text():
+        words = [random.choice(long)]
+
+        while random.random() < .5:
+            words.append(random.choice(short + long))
+
+        return ' '.join(words)
+
+    return [Expression(text(), 'thing', i) for i in range(0, EXPRESSIONS)]
+
+
+def bench(name: Text, pretender: ExpressionPretender, queries: List[Text]):
+    def run():
+        for q in queries:
+            list(pretender.candidates(Word(q)))
+
+    found = sum(
+        1 for q in queries
+        if any(True for _ in pretender.candidates(Word(q)))
+    )
+    proofs = sum(len(list(pretender.candidates(Word(q)))) for q in queries)
+    duration = timeit(run, number=1)
+
+    print(
+        f'{name:<24} '
+        f'{duration / len(queries) * 1e6:8.1f} µs/word  '
+        f'recall {found / len(queries):6.1%}  '
+        f'{proofs / len(queries):6.1f} proofs/word'
+    )
+
+
+def main():
+    expressions = make_expressions()
+    short = sorted(set(
+        w.normalized
+        for e in expressions
+        for w in e.words
+        if len(w.normalized) <= ShortWordPretender.MAX_LENGTH
+    ))
+
+    class LowScorePretender(ExpressionPretender):
+        MIN_SCORE = .2
+
+    pretenders = [
+        ('trigrams', ExpressionPretender(expressions)),
+        ('trigrams (MIN_SCORE .2)', LowScorePretender(expressions)),
+        ('deletions', ShortWordPretender(expressions)),
+    ]
+
+    for length in range(2, ShortWordPretender.MAX_LENGTH + 1):
+        words = [w for w in short if len(w) == length]
+        queries = [typo(random.choice(words)) for _ in range(0, QUERIES)]
+
+        print(f'{length}-letter words')
+
+        for name, pretender in pretenders:
+            bench(name, pretender, queries)
+
+
+if __name__ == '__main__':
+    main()
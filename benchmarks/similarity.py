@@ -0,0 +1,79 @@
+"""
+Compares the label matching with the native kernel, the pure-Python kernel,
+the set-based similarity of `Trigram` and the indexed `LabelMatcher`. Run it
+with:
+
+    PYTHONPATH=src python benchmarks/similarity.py
+"""
+import string
+from random import (
+    Random,
+)
+from timeit import (
+    timeit,
+)
+
+from iron_throne import (
+    kernel,
+)
+from iron_throne.trigram import (
+    LabelMatcher,
+    Trigram,
+)
+
+random = Random(42)
+
+LABELS = 500
+QUERIES = 200
+
+
+def make_text():
+    letters = string.ascii_lowercase + ' '
+    return ''.join(random.choice(letters) for _ in range(0, 20))
+
+
+def main():
+    labels = [Trigram(make_text()) for _ in range(0, LABELS)]
+    codes = [t.codes for t in labels]
+    queries = [Trigram(make_text()) for _ in range(0, QUERIES)]
+
+    def sets():
+        for q in queries:
+            # noinspection PyProtectedMember
+            [
+                len(t._trigrams & q._trigrams)
+                / (len(t._trigrams) + len(q._trigrams)
+                   - len(t._trigrams & q._trigrams))
+                for t in labels
+            ]
+
+    def python():
+        for q in queries:
+            kernel.py_similarities(q.codes, codes)
+
+    def native():
+        for q in queries:
+            kernel.similarities(q.codes, codes)
+
+    label_matcher = LabelMatcher([(t, i) for i, t in enumerate(labels)])
+
+    def indexed():
+        for q in queries:
+            label_matcher.top(q, k=5)
+
+    candidates = [
+        ('sets', sets),
+        ('python kernel', python),
+        ('indexed', indexed),
+    ]
+
+    if kernel.NATIVE:
+        candidates.append(('native kernel', native))
+
+    for name, f in candidates:
+        duration = timeit(f, number=1)
+        print(f'{name:<16} {duration / QUERIES * 1e6:8.1f} µs/query')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures the cold start of the package: time to import it and latency of
+the first request, each in a fresh interpreter. Run it with:
+
+    PYTHONPATH=src python benchmarks/startup.py
+"""
+import json
+import subprocess
+import sys
+from statistics import (
+    median,
+)
+
+RUNS = 10
+
+SCRIPT = '''
+import json
+from time import perf_counter
+
+start = perf_counter()
+
+import iron_throne
+from iron_throne.constraints import ClaimScores, FullMatches, LargestClaim
+from iron_throne.pretenders import Expression, ExpressionPretender
+from iron_throne.trigram import preload_transliterations
+
+imported = perf_counter()
+
+if {preload!r}:
+    preload_transliterations(['latin'])
+
+preloaded = perf_counter()
+
+i = iron_throne.IronThrone([
+    ExpressionPretender([
+        Expression('potato salad', 'food', 'potato-salad'),
+        Expression('crème brûlée', 'food', 'creme-brulee'),
+    ]),
+], [
+    FullMatches(),
+    LargestClaim(),
+    ClaimScores(),
+])
+i.get_entities('I like potato salad and crème brûlée')
+
+done = perf_counter()
+
+print(json.dumps({{
+    'import': imported - start,
+    'preload': preloaded - imported,
+    'first request': done - preloaded,
+}}))
+'''
+
+
+def run(preload: bool):
+    results = []
+
+    for _ in range(0, RUNS):
+        out = subprocess.check_output([
+            sys.executable,
+            '-c',
+            SCRIPT.format(preload=preload),
+        ])
+        results.append(json.loads(out))
+
+    for key in results[0]:
+        ms = median(r[key] for r in results) * 1000
+        print(f'  {key:<16} {ms:8.2f} ms')
+
+
+def main():
+    for preload in [False, True]:
+        print(f'preload={preload}')
+        run(preload)
+
+
+if __name__ == '__main__':
+    main()
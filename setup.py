@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 
 import os
 import codecs
-from setuptools import setup, find_packages
+from setuptools import Extension, setup, find_packages
 
 try:
     from pip.req import parse_requirements
@@ -30,6 +30,14 @@ setup(
     package_dir={
         '': 'src',
     },
+    ext_modules=[
+        # Optional speedup, iron_throne.kernel falls back to pure Python
+        Extension(
+            'iron_throne._ctrigram',
+            sources=['src/iron_throne/_ctrigram.c'],
+            optional=True,
+        ),
+    ],
     scripts=[],
     include_package_data=True,
     license='Apache License 2.0',
@@ -39,6 +47,9 @@ setup(
     author='Rémy Sanchez',
     author_email='remy.sanchez@hyperthese.net',
     install_requires=[str(x.req) for x in requirements],
+    extras_require={
+        'batch': ['numpy'],
+    },
     classifiers=[
         'License :: OSI Approved :: Apache Software License',
         'Development Status :: 3 - Alpha',
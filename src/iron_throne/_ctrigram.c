@@ -0,0 +1,172 @@
+/*
+ * Native version of the similarity functions from iron_throne.kernel.
+ *
+ * Trigrams are given as buffers of sorted unique uint64 (like an
+ * array.array('Q')), which allows to compute intersections with a simple
+ * merge.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+
+/*
+ * Tells if a buffer format is a native 8-byte unsigned integer ("Q" or "L",
+ * optionally prefixed by a native byte order).
+ */
+static int
+is_uint64(const char *format, Py_ssize_t itemsize)
+{
+    if (format == NULL || itemsize != 8)
+        return 0;
+
+    if (format[0] == '@' || format[0] == '=')
+        format++;
+#if PY_LITTLE_ENDIAN
+    else if (format[0] == '<')
+        format++;
+#else
+    else if (format[0] == '>' || format[0] == '!')
+        format++;
+#endif
+
+    return (format[0] == 'Q' || format[0] == 'L') && format[1] == '\0';
+}
+
+static int
+get_codes(PyObject *obj, Py_buffer *view)
+{
+    if (PyObject_GetBuffer(obj, view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+        return -1;
+
+    if (!is_uint64(view->format, view->itemsize)) {
+        PyBuffer_Release(view);
+        PyErr_SetString(PyExc_TypeError, "expected a buffer of uint64");
+        return -1;
+    }
+
+    return 0;
+}
+
+static double
+jaccard_codes(const uint64_t *a, Py_ssize_t na, const uint64_t *b,
+              Py_ssize_t nb)
+{
+    Py_ssize_t i = 0, j = 0, count = 0;
+
+    if (!na || !nb)
+        return 0.0;
+
+    while (i < na && j < nb) {
+        if (a[i] < b[j]) {
+            i++;
+        } else if (a[i] > b[j]) {
+            j++;
+        } else {
+            count++;
+            i++;
+            j++;
+        }
+    }
+
+    return (double) count / ((double) na + (double) nb - (double) count);
+}
+
+static PyObject *
+jaccard(PyObject *self, PyObject *args)
+{
+    PyObject *a, *b;
+    Py_buffer va, vb;
+    double out;
+
+    if (!PyArg_ParseTuple(args, "OO", &a, &b))
+        return NULL;
+
+    if (get_codes(a, &va) < 0)
+        return NULL;
+
+    if (get_codes(b, &vb) < 0) {
+        PyBuffer_Release(&va);
+        return NULL;
+    }
+
+    out = jaccard_codes(va.buf, va.len / 8, vb.buf, vb.len / 8);
+
+    PyBuffer_Release(&va);
+    PyBuffer_Release(&vb);
+
+    return PyFloat_FromDouble(out);
+}
+
+static PyObject *
+similarities(PyObject *self, PyObject *args)
+{
+    PyObject *query, *labels, *seq, *out = NULL;
+    Py_buffer vq, vl;
+    Py_ssize_t i, n;
+
+    if (!PyArg_ParseTuple(args, "OO", &query, &labels))
+        return NULL;
+
+    seq = PySequence_Fast(labels, "labels must be a sequence");
+
+    if (seq == NULL)
+        return NULL;
+
+    if (get_codes(query, &vq) < 0)
+        goto end;
+
+    n = PySequence_Fast_GET_SIZE(seq);
+    out = PyList_New(n);
+
+    if (out == NULL)
+        goto release;
+
+    for (i = 0; i < n; i++) {
+        PyObject *score;
+
+        if (get_codes(PySequence_Fast_GET_ITEM(seq, i), &vl) < 0) {
+            Py_CLEAR(out);
+            goto release;
+        }
+
+        score = PyFloat_FromDouble(
+            jaccard_codes(vq.buf, vq.len / 8, vl.buf, vl.len / 8)
+        );
+        PyBuffer_Release(&vl);
+
+        if (score == NULL) {
+            Py_CLEAR(out);
+            goto release;
+        }
+
+        PyList_SET_ITEM(out, i, score);
+    }
+
+release:
+    PyBuffer_Release(&vq);
+end:
+    Py_DECREF(seq);
+    return out;
+}
+
+static PyMethodDef methods[] = {
+    {"jaccard", jaccard, METH_VARARGS,
+     "Jaccard similarity of two sorted arrays of trigram codes."},
+    {"similarities", similarities, METH_VARARGS,
+     "Jaccard similarity of a query with each of the labels."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT,
+    "_ctrigram",
+    NULL,
+    -1,
+    methods
+};
+
+PyMODINIT_FUNC
+PyInit__ctrigram(void)
+{
+    return PyModule_Create(&module);
+}
@@ -0,0 +1,200 @@
+"""
+Compiled models. Building a model means tokenizing all the expressions,
+building the indexes and compiling the constraints, which is fast but still
+too slow to do at the boot of each server. Instead, a configured
+`IronThrone` can be compiled once into an artifact file:
+
+>>> compile_model(throne, 'model.iron', version='2024-03-01')
+
+And then loaded as many times as needed:
+
+>>> throne = load_model('model.iron')
+
+The file starts with a header (format version, model version, SHA-256 of
+the content) followed by the pickled model. Loading maps the file in memory
+and unpickles from the map, which avoids reading it into a copy first. The
+model itself is still rebuilt object by object: the index is made of dicts,
+lists and tuples, which pickle doesn't store out-of-band. Buffers of objects
+which do support it (protocol 5) are written after the payload and loaded
+from the map without copy.
+
+Classes are pickled by reference: the artifact must be loaded with the same
+code as the one that compiled it. Pretenders running in other processes
+(`ShardedPretender`) and solver classes bound to an executor can't be
+compiled.
+
+Only load artifacts from a trusted source. The checksum detects a corrupted
+file, not a forged one (it's not a signature), and unpickling a forged file
+can run arbitrary code.
+"""
+import json
+import os
+import pickle
+from hashlib import (
+    sha256,
+)
+from mmap import (
+    ACCESS_READ,
+    mmap,
+)
+from struct import (
+    Struct,
+)
+from typing import (
+    List,
+    NamedTuple,
+    Text,
+    Tuple,
+)
+
+from .tourney import (
+    IronThrone,
+)
+
+MAGIC = b'IRONTHRN'
+FORMAT_VERSION = 1
+
+# Magic and size of the JSON header that follows
+PREAMBLE = Struct('>8sI')
+
+
+class ArtifactError(ValueError):
+    """
+    The file is not an artifact, is corrupted or has an unsupported format.
+    """
+
+
+class ArtifactInfo(NamedTuple):
+    format: int
+    version: Text
+    sha256: Text
+    payload: int
+    buffers: List[int]
+
+
+def compile_model(throne: IronThrone,
+                  path: Text,
+                  version: Text = '') -> ArtifactInfo:
+    """
+    Saves the model into an artifact file. The `version` is a free label
+    which is kept in the header, to know which model a server runs.
+
+    The file is written next to the destination and then renamed, so a
+    server never sees a partial artifact.
+    """
+
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(throne, protocol=5, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+
+    digest = sha256(payload)
+
+    for raw in raws:
+        digest.update(raw)
+
+    info = ArtifactInfo(
+        format=FORMAT_VERSION,
+        version=version,
+        sha256=digest.hexdigest(),
+        payload=len(payload),
+        buffers=[raw.nbytes for raw in raws],
+    )
+    header = json.dumps(info._asdict()).encode()
+    tmp = f'{path}.tmp'
+
+    with open(tmp, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(payload)
+
+        for raw in raws:
+            f.write(raw)
+
+    os.replace(tmp, path)
+
+    return info
+
+
+def parse_header(data: memoryview) -> Tuple[ArtifactInfo, int]:
+    """
+    Reads the header of an artifact and returns it along with the offset of
+    the payload.
+    """
+
+    if len(data) < PREAMBLE.size:
+        raise ArtifactError('File is too short to be an artifact')
+
+    magic, size = PREAMBLE.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ArtifactError('File is not an artifact')
+
+    offset = PREAMBLE.size + size
+
+    try:
+        info = ArtifactInfo(**json.loads(bytes(data[PREAMBLE.size:offset])))
+    except (ValueError, TypeError):
+        raise ArtifactError('Artifact header is corrupted')
+
+    if info.format != FORMAT_VERSION:
+        raise ArtifactError(f'Unsupported artifact format {info.format}')
+
+    if offset + info.payload + sum(info.buffers) != len(data):
+        raise ArtifactError('Artifact has not the expected size')
+
+    return info, offset
+
+
+def read_info(path: Text) -> ArtifactInfo:
+    """
+    Reads the header of an artifact, without loading the model.
+    """
+
+    with open(path, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as m:
+        with memoryview(m) as data:
+            return parse_header(data)[0]
+
+
+def load_model(path: Text, verify: bool = True) -> IronThrone:
+    """
+    Loads a model compiled by `compile_model()`. Unless `verify` is false,
+    the checksum of the content is checked first.
+
+    The file must come from a trusted source, see the module documentation.
+    """
+
+    with open(path, 'rb') as f:
+        m = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+    data = memoryview(m)
+    buffers: List[memoryview] = []
+
+    try:
+        info, offset = parse_header(data)
+        end = offset + info.payload
+
+        for size in info.buffers:
+            buffers.append(data[end:end + size])
+            end += size
+
+        with data[offset:offset + info.payload] as payload:
+            if verify:
+                digest = sha256(payload)
+
+                for buffer in buffers:
+                    digest.update(buffer)
+
+                if digest.hexdigest() != info.sha256:
+                    raise ArtifactError('Artifact checksum does not match')
+
+            throne = pickle.loads(payload, buffers=buffers)
+    finally:
+        # The map stays open as long as buffers from it are in use
+        if not buffers:
+            data.release()
+            m.close()
+
+    if not isinstance(throne, IronThrone):
+        raise ArtifactError('Artifact does not contain an IronThrone')
+
+    return throne
@@ -0,0 +1,177 @@
+"""
+Scoring many trigrams against many matchers at once, for example to run a
+whole conversation log through the intent matchers.
+
+NumPy is used when it is installed (`pip install iron_throne[batch]`), in
+which case all the intersections are counted at once over a vocabulary shared
+by all the patterns. Otherwise the matchers are called one by one.
+"""
+from itertools import (
+    chain,
+)
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .trigram import (
+    LabelMatcher,
+    Matcher,
+    Trigram,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AnyMatcher = Union[Matcher, LabelMatcher]
+
+# Number of trigrams multiplied at once, to keep the dense matrices small
+CHUNK_SIZE = 1024
+
+
+def groups_of(matcher: AnyMatcher) -> List[Tuple[Trigram, ...]]:
+    """
+    Returns the (positive, negatives...) groups of a matcher. Labels of a
+    label matcher are groups without negatives.
+    """
+
+    if isinstance(matcher, LabelMatcher):
+        return [(t,) for t, _ in matcher.trigrams]
+
+    return matcher.trigrams
+
+
+def score_one(matcher: AnyMatcher, trigram: Trigram) -> float:
+    if isinstance(matcher, LabelMatcher):
+        return max((s for s, _ in matcher.top(trigram, k=1)), default=0.)
+
+    return matcher % trigram
+
+
+def py_similarity_matrix(trigrams: Sequence[Trigram],
+                         matchers: Sequence[AnyMatcher]) -> List[List[float]]:
+    return [[score_one(m, t) for m in matchers] for t in trigrams]
+
+
+def flatten_codes(trigrams: Sequence[Trigram]) \
+        -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Returns the codes of all the trigrams in one array, along with the
+    length of each trigram.
+    """
+
+    lengths = np.fromiter(
+        (len(t.codes) for t in trigrams),
+        dtype=np.int64,
+        count=len(trigrams),
+    )
+    codes = np.fromiter(
+        chain.from_iterable(t.codes for t in trigrams),
+        dtype=np.uint64,
+        count=int(lengths.sum()),
+    )
+
+    return codes, lengths
+
+
+def np_similarity_matrix(trigrams: Sequence[Trigram],
+                         matchers: Sequence[AnyMatcher]) -> 'np.ndarray':
+    """
+    The codes of all the patterns are sorted, which gives the shared
+    vocabulary. For each code of a trigram, the patterns that contain it are
+    found with a binary search, then the pairs are counted to get the size of
+    intersections. Finally the positive/negative logic of `Matcher` is
+    applied group by group.
+    """
+
+    flat: List[Trigram] = []
+    starts: List[int] = []
+    negatives: List[Tuple[int, int, int]] = []
+    owners: List[int] = []
+
+    for j, matcher in enumerate(matchers):
+        for local in groups_of(matcher):
+            if len(local) > 1:
+                negatives.append((len(starts), len(flat) + 1, len(local) - 1))
+
+            starts.append(len(flat))
+            owners.append(j)
+            flat.extend(local)
+
+    out = np.zeros((len(trigrams), len(matchers)), dtype=np.float64)
+
+    if not flat:
+        return out
+
+    p_codes, p_lengths = flatten_codes(flat)
+    p_rows = np.repeat(np.arange(len(flat)), p_lengths)
+    order = np.argsort(p_codes, kind='stable')
+    p_codes = p_codes[order]
+    p_rows = p_rows[order]
+
+    neg_groups = np.array([g for g, _, _ in negatives], dtype=np.int64)
+    neg_cols = np.array([
+        c
+        for _, start, length in negatives
+        for c in range(start, start + length)
+    ], dtype=np.int64)
+    neg_offsets = np.cumsum([0] + [n for _, _, n in negatives])[:-1]
+
+    owners_array = np.array(owners)
+    has_groups = np.unique(owners_array)
+    owner_offsets = np.searchsorted(owners_array, has_groups)
+
+    for chunk_start in range(0, len(trigrams), CHUNK_SIZE):
+        chunk = trigrams[chunk_start:chunk_start + CHUNK_SIZE]
+        q_codes, q_lengths = flatten_codes(chunk)
+        q_rows = np.repeat(np.arange(len(chunk)), q_lengths)
+
+        lo = np.searchsorted(p_codes, q_codes, side='left')
+        n = np.searchsorted(p_codes, q_codes, side='right') - lo
+        rows = np.repeat(q_rows, n)
+        idx = np.arange(int(n.sum())) + np.repeat(lo - (np.cumsum(n) - n), n)
+        cols = p_rows[idx]
+
+        pairs, counts = np.unique(rows * len(flat) + cols, return_counts=True)
+        counts = counts.astype(np.float64)
+        union = (
+            p_lengths[pairs % len(flat)] + q_lengths[pairs // len(flat)]
+        ) - counts
+        scores = np.zeros((len(chunk), len(flat)), dtype=np.float64)
+        scores.flat[pairs] = counts / union
+
+        pos = scores[:, starts]
+
+        if negatives:
+            neg = np.maximum.reduceat(scores[:, neg_cols], neg_offsets, axis=1)
+            pos[:, neg_groups] = np.where(
+                neg > pos[:, neg_groups],
+                0.,
+                pos[:, neg_groups],
+            )
+
+        out[chunk_start:chunk_start + len(chunk), has_groups] = \
+            np.maximum.reduceat(pos, owner_offsets, axis=1)
+
+    return out
+
+
+def similarity_matrix(trigrams: Sequence[Trigram],
+                      matchers: Sequence[AnyMatcher]):
+    """
+    Computes the similarity of each trigram with each matcher, which is the
+    same as `matcher % trigram` for a `Matcher` and the score returned by
+    `similarity()` for a `LabelMatcher`.
+
+    Returns a NumPy array of shape (len(trigrams), len(matchers)) if NumPy is
+    installed and a list of lists otherwise.
+    """
+
+    if np is None:
+        return py_similarity_matrix(trigrams, matchers)
+
+    return np_similarity_matrix(trigrams, matchers)
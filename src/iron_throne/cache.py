@@ -0,0 +1,99 @@
+"""
+Bounded least-recently-used cache, shared between threads.
+"""
+from collections import (
+    OrderedDict,
+)
+from threading import (
+    Lock,
+)
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+)
+
+
+class LRUCache(object):
+    """
+    Keeps at most `max_entries` entries and, if `max_bytes` is given, at most
+    that many bytes (as estimated by the caller for each entry). The least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = \
+            OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Only the configuration is pickled, the cache comes back empty.
+        """
+
+        return {
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['max_entries'], state['max_bytes'])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            try:
+                value, _ = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """
+        Stores a value, `size` being its estimated size in bytes. Values
+        bigger than the whole memory budget are not stored.
+        """
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+
+            self.entries[key] = (value, size)
+            self.bytes += size
+
+            while len(self.entries) > self.max_entries or (
+                    self.max_bytes is not None
+                    and self.bytes > self.max_bytes):
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+
+        if not total:
+            return .0
+
+        return float(self.hits) / float(total)
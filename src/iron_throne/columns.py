@@ -0,0 +1,136 @@
+"""
+Columnar representation of the candidates found by a pretender in a
+sentence. Most candidates don't survive the cleanup, so instead of creating
+a `Claim` and a `Proof` object for each of them, they are stored in parallel
+arrays (one row per candidate) on which the cleanup and scoring are done.
+Objects are only created for the rows that are left.
+"""
+from array import (
+    array,
+)
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    TypeVar,
+)
+
+from .claim import (
+    Claim,
+    Proof,
+)
+from .words import (
+    Word,
+)
+
+K = TypeVar('K', bound=Hashable)
+
+
+class ClaimColumns(Generic[K]):
+    """
+    Each row is a candidate: the word it claims (by position in the
+    sentence), the claim it belongs to (by id), its order within the claim
+    and its score. Claim ids are given by order of appearance of the claim
+    keys (for example, the expressions).
+    """
+
+    def __init__(self, sentence: List[Word]) -> None:
+        self.sentence = sentence
+        self.words = array('l')
+        self.claims = array('l')
+        self.orders = array('l')
+        self.scores = array('d')
+
+        self.ids: Dict[K, int] = {}
+        self.keys: List[K] = []
+        self.lengths: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def claim_id(self, key: K, length: int) -> int:
+        """
+        Returns the id of the claim with that key, creating it if needed.
+        """
+
+        claim = self.ids.get(key)
+
+        if claim is None:
+            claim = len(self.keys)
+            self.ids[key] = claim
+            self.keys.append(key)
+            self.lengths.append(length)
+
+        return claim
+
+    def append(self, word: int, claim: int, order: int, score: float) -> None:
+        self.words.append(word)
+        self.claims.append(claim)
+        self.orders.append(order)
+        self.scores.append(score)
+
+    def select(self, rows: Iterable[int]) -> 'ClaimColumns[K]':
+        """
+        Copy of the columns which only has the given rows (in the given
+        order). Claim ids don't change.
+        """
+
+        out: ClaimColumns[K] = ClaimColumns(self.sentence)
+        out.ids = self.ids
+        out.keys = self.keys
+        out.lengths = self.lengths
+
+        for i in rows:
+            out.append(
+                self.words[i],
+                self.claims[i],
+                self.orders[i],
+                self.scores[i],
+            )
+
+        return out
+
+    def claim_scores(self) -> List[float]:
+        """
+        Average score of the rows of each claim (0 for claims without rows).
+        """
+
+        totals = [.0] * len(self.keys)
+        counts = [0] * len(self.keys)
+
+        for claim, score in zip(self.claims, self.scores):
+            totals[claim] += score
+            counts[claim] += 1
+
+        return [
+            total / float(count) if count else .0
+            for total, count in zip(totals, counts)
+        ]
+
+    def build(self,
+              make_claim: Callable[[K, float], Claim],
+              scores: List[float]) -> Dict[K, Claim]:
+        """
+        Creates the claims and proofs of all the rows and attaches them to
+        the words of the sentence. The claims are created by
+        `make_claim(key, score)`.
+        """
+
+        claims: Dict[int, Claim] = {}
+
+        for word, claim, order, score in zip(
+                self.words, self.claims, self.orders, self.scores):
+            if claim not in claims:
+                claims[claim] = make_claim(self.keys[claim], scores[claim])
+
+            Proof.attach(
+                order=order,
+                claim=claims[claim],
+                word=self.sentence[word],
+                score=score,
+            )
+
+        return {self.keys[k]: claim for k, claim in claims.items()}
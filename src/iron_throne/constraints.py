@@ -1,6 +1,12 @@
+from bisect import (
+    bisect_left,
+)
 from collections import (
     defaultdict,
 )
+from math import (
+    inf,
+)
 from typing import (
     Dict,
     List,
@@ -15,6 +21,9 @@ from .claim import (
     Claim,
     Proof,
 )
+from .columns import (
+    ClaimColumns,
+)
 from .utils import (
     is_contiguous,
 )
@@ -30,6 +39,36 @@ class Constraint(object):
         won't ever provide a good solution
         """
 
+    def cleanup_columns(self, columns: ClaimColumns) -> ClaimColumns:
+        """
+        Same as `cleanup()`, but done by a pretender on its own candidates
+        before creating the claims (see `ClaimColumns`). Only constraints
+        which can clean the claims of a pretender independently from the
+        other pretenders can implement it. Returns the rows to keep as new
+        columns.
+        """
+
+        return columns
+
+    def infeasible(self, words: List[Word]) -> List[Set[Claim]]:
+        """
+        Groups of claims that this constraint would rather never see in a
+        solution. A group is only removed if removing it can't increase the
+        energies of the constraints (see `prune()`).
+        """
+
+        return []
+
+    def removal_cost(self, words: List[Word], claims: Set[Claim]) -> float:
+        """
+        Highest increase of the energy when, in a state which has at least
+        one proof of the given claims, all the proofs of these claims are
+        removed. It can be negative if the energy always decreases. Unknown
+        (infinite) by default, which prevents any removal.
+        """
+
+        return inf
+
     def energy_bounds(self, words: List[Word]) -> Tuple[float, float]:
         """
         Given those words, compute the lowest and highest bound of energy.
@@ -123,6 +162,72 @@ class FullMatches(Constraint):
         for word in words:
             word.proofs = [p for p in word.proofs if p in no_delete]
 
+    def cleanup_columns(self, columns: ClaimColumns) -> ClaimColumns:
+        """
+        Same logic as `cleanup()`, applied to the rows of each claim (which
+        are sorted by word). Like in `cleanup()`, where proofs are compared by
+        value, rows equal to a kept row (same claim, order, score and word
+        text) are kept too.
+        """
+
+        rows_of: Dict[int, List[int]] = defaultdict(lambda: [])
+        keep: Set[int] = set()
+
+        for row, claim in enumerate(columns.claims):
+            rows_of[claim].append(row)
+
+        for claim, rows in rows_of.items():
+            positions = [columns.words[r] for r in rows]
+
+            for row in rows:
+                if columns.orders[row] != 0:
+                    continue
+
+                to_keep: List[int] = []
+                skipped = None
+                start = bisect_left(positions, columns.words[row])
+
+                for r in rows[start:]:
+                    if columns.words[r] == skipped:
+                        continue
+
+                    order = columns.orders[r]
+                    is_first = not to_keep and order == 0
+                    is_next = to_keep \
+                        and columns.orders[to_keep[-1]] + 1 == order
+
+                    if is_first or is_next:
+                        to_keep.append(r)
+                    else:
+                        skipped = columns.words[r]
+
+                last = columns.lengths[claim] - 1
+
+                if to_keep and columns.orders[to_keep[-1]] == last:
+                    keep.update(to_keep)
+
+        def key(r: int) -> Tuple[Text, int, int, float]:
+            return (
+                columns.sentence[columns.words[r]].text,
+                columns.claims[r],
+                columns.orders[r],
+                columns.scores[r],
+            )
+
+        kept = set(key(r) for r in keep)
+
+        return columns.select(
+            r for r in range(0, len(columns)) if key(r) in kept
+        )
+
+    def removal_cost(self, words: List[Word], claims: Set[Claim]) -> float:
+        """
+        Claims are checked independently, removing some can only remove
+        wrong claims.
+        """
+
+        return .0
+
     def energy_bounds(self, words: List[Word]) -> Tuple[float, float]:
         return 0, len(words) * self.WRONG_CLAIM_WEIGHT
 
@@ -169,6 +274,17 @@ class EntitySet(NamedTuple):
     also_allowed: Set[Text]
 
 
+class CompiledSet(NamedTuple):
+    """
+    An `EntitySet` translated into bit masks of entity IDs (see
+    `AllowedSets.compile()`).
+    """
+
+    penalty: int
+    needs: int
+    allowed: int
+
+
 class AllowedSets(Constraint):
     EXTRA_ENTITY_WEIGHT = 100.
 
@@ -192,10 +308,110 @@ class AllowedSets(Constraint):
 
         The second set is a list of other entities that are allowed to be
         found.
+
+        The sets are compiled once at init, so they must not be modified
+        afterwards.
         """
 
         self.sets: List[EntitySet] = sets
 
+        self.entity_ids: Dict[Text, int] = {}
+        self.compiled: List[CompiledSet] = self.compile()
+        self.choices: Dict[int, Tuple[int, int]] = {}
+
+        self.needs = 0
+        self.allowed = 0
+
+        for cs in self.compiled:
+            self.needs |= cs.needs
+            self.allowed |= cs.allowed
+
+    def compile(self) -> List[CompiledSet]:
+        """
+        Gives a bit to each known entity and transforms the sets into masks
+        of those bits. The sets are sorted by penalty (the sort being stable,
+        equal penalties keep their order of priority) so that the chosen set
+        is simply the first one that matches.
+        """
+
+        for es in self.sets:
+            for entity in sorted(es.needs_one_of | es.also_allowed):
+                self.entity_ids.setdefault(entity, len(self.entity_ids))
+
+        def mask(entities: Set[Text]) -> int:
+            out = 0
+
+            for entity in entities:
+                out |= self.entity_bit(entity)
+
+            return out
+
+        compiled = [
+            CompiledSet(
+                penalty=es.penalty,
+                needs=mask(es.needs_one_of),
+                allowed=mask(es.needs_one_of | es.also_allowed),
+            )
+            for es in self.sets
+        ]
+
+        return sorted(compiled, key=lambda cs: cs.penalty)
+
+    def entity_bit(self, entity: Text) -> int:
+        """
+        Returns the bit of an entity, or 0 for entities that are not part of
+        any set. Bits are only given at init, so that the constraint can be
+        shared between threads and doesn't grow with the entities it sees.
+        """
+
+        try:
+            return 1 << self.entity_ids[entity]
+        except KeyError:
+            return 0
+
+    def infeasible(self, words: List[Word]) -> List[Set[Claim]]:
+        """
+        Entities which are not allowed by any set always count as extra
+        entities. All the claims of such an entity form a group.
+        """
+
+        groups: Dict[Text, Set[Claim]] = defaultdict(set)
+
+        for word in words:
+            for proof in word.proofs:
+                if not self.entity_bit(proof.claim.entity) & self.allowed:
+                    groups[proof.claim.entity].add(proof.claim)
+
+        return list(groups.values())
+
+    def removal_cost(self, words: List[Word], claims: Set[Claim]) -> float:
+        """
+        If none of the entities is needed by a set, the chosen set doesn't
+        change and the number of extra entities can only decrease. If all
+        the claims of entities that are never allowed are removed, there is
+        at least one extra entity less.
+        """
+
+        entities = set(c.entity for c in claims)
+        mask = 0
+
+        for entity in entities:
+            mask |= self.entity_bit(entity)
+
+        if mask & self.needs:
+            return inf
+
+        if mask & self.allowed:
+            return .0
+
+        for word in words:
+            for proof in word.proofs:
+                if proof.claim.entity in entities \
+                        and proof.claim not in claims:
+                    return .0
+
+        return -self.EXTRA_ENTITY_WEIGHT
+
     def energy_bounds(self, words: List[Word]):
         max_penalty = min(self.sets, key=lambda s: s.penalty).penalty
         return max_penalty, max_penalty + len(words) * self.EXTRA_ENTITY_WEIGHT
@@ -208,6 +424,30 @@ class AllowedSets(Constraint):
 
         return entities
 
+    def extract_mask(self, proofs: List[Optional[Proof]]) -> Tuple[int, int]:
+        """
+        Same as `extract_entities()` but returns a bit mask of the present
+        entities which are part of a set, along with the number of the other
+        ones (which are extra entities whatever the chosen set).
+        """
+
+        present = 0
+        unknown: Optional[Set[Text]] = None
+
+        for proof in proofs:
+            if proof is not None:
+                entity = proof.claim.entity
+
+                try:
+                    present |= 1 << self.entity_ids[entity]
+                except KeyError:
+                    if unknown is None:
+                        unknown = set()
+
+                    unknown.add(entity)
+
+        return present, len(unknown) if unknown is not None else 0
+
     def choose_set(self, entities: Set[Text]) -> Optional[EntitySet]:
         def list_options():
             for es in self.sets:
@@ -217,27 +457,38 @@ class AllowedSets(Constraint):
         # noinspection PyTypeChecker
         return min(list_options(), key=lambda es: es.penalty, default=None)
 
-    def energy(self, proofs: List[Optional[Proof]]):
-        allowed = set()
-        penalty = 0
-        present = self.extract_entities(proofs)
-        current_set = self.choose_set(present)
+    def choose(self, present: int) -> Tuple[int, int]:
+        """
+        For a mask of present entities, returns the number of entities that
+        are not allowed and the penalty of the chosen set. Results only depend
+        on the configuration, so they are cached for all the sentences.
+        """
 
-        if current_set:
-            allowed = current_set.needs_one_of | current_set.also_allowed
-            penalty = current_set.penalty
+        try:
+            return self.choices[present]
+        except KeyError:
+            pass
 
-        return len(present - allowed) * self.EXTRA_ENTITY_WEIGHT + penalty
+        extra, penalty = present, 0
 
-    def score(self, proofs: List[Optional[Proof]]):
-        allowed = set()
-        present = self.extract_entities(proofs)
-        current_set = self.choose_set(present)
+        for cs in self.compiled:
+            if cs.needs & present:
+                extra, penalty = present & ~cs.allowed, cs.penalty
+                break
+
+        out = self.choices[present] = (bin(extra).count('1'), penalty)
+        return out
+
+    def energy(self, proofs: List[Optional[Proof]]):
+        present, unknown = self.extract_mask(proofs)
+        extra, penalty = self.choose(present)
+        return (extra + unknown) * self.EXTRA_ENTITY_WEIGHT + penalty
 
-        if current_set:
-            allowed = current_set.needs_one_of | current_set.also_allowed
+    def score(self, proofs: List[Optional[Proof]]):
+        present, unknown = self.extract_mask(proofs)
+        extra, _ = self.choose(present)
 
-        if present - allowed:
+        if extra or unknown:
             return .0
 
         return 1.
@@ -246,6 +497,23 @@ class AllowedSets(Constraint):
 class LargestClaim(Constraint):
     CLAIM_WEIGHT = 5.
 
+    def removal_cost(self, words: List[Word], claims: Set[Claim]) -> float:
+        """
+        Words left without proof cost `CLAIM_WEIGHT`, which they already
+        did unless their proof was one of the longest of the word.
+        """
+
+        cost = .0
+
+        for word in words:
+            longest = max((p.claim.length for p in word.proofs), default=0)
+
+            if any(p.claim in claims and p.claim.length == longest
+                   for p in word.proofs):
+                cost += self.CLAIM_WEIGHT
+
+        return cost
+
     def energy_bounds(self, words: List[Word]) -> Tuple[float, float]:
         return len(words) * self.CLAIM_WEIGHT, len(words) * self.CLAIM_WEIGHT
 
@@ -277,6 +545,31 @@ class LargestClaim(Constraint):
 class ClaimScores(Constraint):
     WORD_WEIGHT = 50.
 
+    def infeasible(self, words: List[Word]) -> List[Set[Claim]]:
+        """
+        Claims without score do no better than leaving their words empty.
+        """
+
+        return [
+            {c}
+            for c in set(p.claim for w in words for p in w.proofs)
+            if c.score <= 0
+        ]
+
+    def removal_cost(self, words: List[Word], claims: Set[Claim]) -> float:
+        """
+        Each word loses at most the best score among its proofs from these
+        claims.
+        """
+
+        return sum(
+            max(
+                (p.claim.score for p in w.proofs if p.claim in claims),
+                default=.0,
+            ) * self.WORD_WEIGHT
+            for w in words
+        )
+
     def energy_bounds(self, words: List[Word]) -> Tuple[float, float]:
         return len(words) * self.WORD_WEIGHT, len(words) * self.WORD_WEIGHT
 
@@ -294,3 +587,34 @@ class ClaimScores(Constraint):
 
         total = sum(scores)
         return float(total) / float(len(scores))
+
+
+def remove_claims(words: List[Word], claims: Set[Claim]) -> None:
+    for word in words:
+        word.proofs = [p for p in word.proofs if p.claim not in claims]
+
+    for claim in claims:
+        claim.proofs = []
+
+
+def prune(words: List[Word], constraints: List[Constraint]) -> None:
+    """
+    Removes the groups of claims that constraints declare infeasible, when
+    removing them from any state can't increase the sum of the energies of
+    the constraints (the sum of their removal costs is not positive), which
+    makes the search space smaller before the annealing even starts.
+
+    This is a heuristic, not an exact reduction: the solver also adds `Tmin`
+    for each constraint whose energy reaches its lower bound, and both the
+    bounds and `Tmin` depend on the claims of the sentence. An optimal state
+    may then contain a pruned claim (for example, a sentence whose only
+    claims are infeasible gets an empty solution). That's why `IronThrone`
+    only prunes when asked to.
+    """
+
+    for constraint in constraints:
+        for claims in constraint.infeasible(words):
+            cost = sum(c.removal_cost(words, claims) for c in constraints)
+
+            if cost <= 0:
+                remove_claims(words, claims)
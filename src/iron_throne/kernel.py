@@ -0,0 +1,87 @@
+"""
+Similarity kernel working on trigram codes (see `Trigram.codes`), which are
+integer-encoded trigrams.
+
+A compiled version is used when the `_ctrigram` extension has been built. It
+works on sorted arrays of codes and computes intersections with a merge.
+Otherwise the pure-Python functions below are used, with frozen sets of
+codes. Both give exactly the same results as the pg_trgm-like similarity.
+
+`jaccard()` backs `Trigram.similarity()`. The `similarities()` scan is not
+used by the matchers anymore: `Matcher` and `LabelMatcher` score through an
+inverted index (see `trigram.InvertedIndex`), which counts the codes each
+label shares with the query while only touching the labels that share one,
+and is faster than the native scan (see `benchmarks/similarity.py`). The
+scan is kept to score a given list of labels, like a pre-filtered one.
+"""
+from array import (
+    array,
+)
+from typing import (
+    Collection,
+    Iterable,
+    List,
+    Sequence,
+)
+
+CodeArray = Collection[int]
+
+
+def py_make_codes(codes: Iterable[int]) -> CodeArray:
+    return frozenset(codes)
+
+
+def py_jaccard(a: CodeArray, b: CodeArray) -> float:
+    """
+    Jaccard similarity of two sets of trigram codes.
+    """
+
+    if not len(a) or not len(b):
+        return 0.
+
+    count = float(len(frozenset(a).intersection(b)))
+
+    return count / (float(len(a)) + float(len(b)) - count)
+
+
+def py_similarities(query: CodeArray, labels: Sequence[CodeArray]) \
+        -> List[float]:
+    """
+    Jaccard similarity of the query with each of the labels.
+    """
+
+    if not len(query):
+        return [0.] * len(labels)
+
+    q = frozenset(query)
+    len2 = float(len(query))
+    out = []
+
+    for label in labels:
+        if not len(label):
+            out.append(0.)
+            continue
+
+        count = float(len(q.intersection(label)))
+        out.append(count / (float(len(label)) + len2 - count))
+
+    return out
+
+
+def native_make_codes(codes: Iterable[int]) -> CodeArray:
+    return array('Q', sorted(codes))
+
+
+try:
+    from ._ctrigram import (
+        jaccard,
+        similarities,
+    )
+except ImportError:
+    NATIVE = False
+    make_codes = py_make_codes
+    jaccard = py_jaccard
+    similarities = py_similarities
+else:
+    NATIVE = True
+    make_codes = native_make_codes
@@ -0,0 +1,114 @@
+"""
+Memory footprint of the indexes. Sizes are measured by walking the objects
+and adding up `sys.getsizeof()`, each object being counted once: objects
+shared by several pretenders (like the interned words) are counted by the
+first one that is measured.
+"""
+from sys import (
+    getsizeof,
+)
+from types import (
+    BuiltinFunctionType,
+    FunctionType,
+    MethodType,
+    ModuleType,
+)
+from typing import (
+    Any,
+    Iterable,
+    NamedTuple,
+    Set,
+)
+
+# Objects which are not part of the data of an index
+SKIPPED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+
+class MemoryBudgetError(MemoryError):
+    """
+    Building the index would take more memory than its budget.
+    """
+
+
+class Footprint(NamedTuple):
+    """
+    Sizes in bytes:
+
+    - `postings`: the vocabulary, the trigram index and other lookup
+      structures (deletions, automaton)
+    - `expressions`: the expressions and their seqs
+    - `words`: the words of the expressions
+    - `trigrams`: the trigram sets of those words
+    - `cache`: the candidates memo (estimated, see `token_candidates()`)
+    """
+
+    postings: int = 0
+    expressions: int = 0
+    words: int = 0
+    trigrams: int = 0
+    cache: int = 0
+
+    @property
+    def index(self) -> int:
+        """
+        Size of everything but the memo, which has its own bound.
+        """
+
+        return self.total - self.cache
+
+    @property
+    def total(self) -> int:
+        return sum(self)
+
+    def report(self) -> str:
+        return '\n'.join(
+            f'{name:<12} {size / 2 ** 20:>9.2f} MB'
+            for name, size in list(self._asdict().items())
+            + [('total', self.total)]
+        )
+
+
+def add_footprints(footprints: Iterable[Footprint]) -> Footprint:
+    return Footprint(*(sum(sizes) for sizes in zip(Footprint(), *footprints)))
+
+
+def deep_size(obj: Any, seen: Set[int]) -> int:
+    """
+    Size of the object and of everything it references, skipping the
+    objects whose id is in `seen` (and adding the others to it).
+    """
+
+    size = 0
+    stack = [obj]
+
+    while stack:
+        o = stack.pop()
+
+        if id(o) in seen or isinstance(o, SKIPPED):
+            continue
+
+        seen.add(id(o))
+        size += getsizeof(o)
+
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+
+        if hasattr(o, '__dict__'):
+            # The attribute names are shared by all the instances
+            attributes = vars(o)
+
+            if id(attributes) not in seen:
+                seen.add(id(attributes))
+                size += getsizeof(attributes)
+                stack.extend(attributes.values())
+
+        slots = getattr(type(o), '__slots__', ())
+
+        for slot in [slots] if isinstance(slots, str) else slots:
+            if hasattr(o, slot):
+                stack.append(getattr(o, slot))
+
+    return size
@@ -0,0 +1,198 @@
+"""
+Streaming version of `IronThrone.get_entities()`. Each step (tokenize, claim,
+cleanup, solve) is a stage: a function which takes an iterable and returns an
+iterator. Stages can be chained, replaced, run on their own (to benchmark
+them, for example) and run on an executor.
+
+>>> pipeline = Pipeline(
+>>>     throne,
+>>>     claim_executor=ThreadPoolExecutor(4),
+>>>     solve_executor=ProcessPoolExecutor(4),
+>>> )
+>>> for result in pipeline(sentences):
+>>>     ...
+
+Pass a `solver_class` to the `IronThrone` to use another solver.
+
+As with `IronThrone.get_result()`, the time budget of the throne covers the
+whole processing of a sentence: the solver gets what's left of it when the
+sentence is sent to the solve stage (time spent waiting for a free worker of
+the solve executor is not counted).
+"""
+from collections import (
+    deque,
+)
+from concurrent.futures import (
+    Executor,
+    Future,
+)
+from functools import (
+    partial,
+)
+from time import (
+    monotonic,
+)
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    Type,
+)
+
+from .constraints import (
+    Constraint,
+)
+from .tourney import (
+    IronThrone,
+    Result,
+    solve,
+)
+from .words import (
+    Word,
+)
+
+Stage = Callable[[Iterable[Any]], Iterator[Any]]
+
+
+class Sentence(list):
+    """
+    Words of a sentence, along with the time at which the pipeline started
+    processing it.
+    """
+
+    def __init__(self, words: List[Word], start: float):
+        super().__init__(words)
+        self.start = start
+
+
+def solve_with_budget(item: Tuple[List[Word], Optional[float]],
+                      constraints: List[Constraint],
+                      solver_class: Optional[Type],
+                      step_budget: Optional[int]) -> Result:
+    """
+    Same as `solve()` for a (words, time budget) pair. This is a plain
+    function so it can be sent to a process pool.
+    """
+
+    words, time_budget = item
+    return solve(words, constraints, solver_class, time_budget, step_budget)
+
+
+def map_stage(func: Callable[[Any], Any],
+              executor: Optional[Executor] = None,
+              window: int = 16) -> Stage:
+    """
+    Creates a stage which applies `func` to each item, in order.
+
+    If an executor is given, up to `window` items are processed at the same
+    time. The stage doesn't read more items from the previous stage until the
+    next one asks for a result, so a slow stage slows down the ones before it
+    instead of piling up work.
+    """
+
+    def stage(items: Iterable[Any]) -> Iterator[Any]:
+        if executor is None:
+            for item in items:
+                yield func(item)
+            return
+
+        pending: Deque[Future] = deque()
+
+        for item in items:
+            pending.append(executor.submit(func, item))
+
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    return stage
+
+
+def chain_stages(*stages: Stage) -> Stage:
+    """
+    Creates a stage that runs all the given stages one after the other.
+    """
+
+    def stage(items: Iterable[Any]) -> Iterator[Any]:
+        for s in stages:
+            items = s(items)
+
+        return iter(items)
+
+    return stage
+
+
+class Pipeline(object):
+    """
+    The stages of an `IronThrone`, ready to process streams of sentences.
+
+    Pretenders and constraints must be safe to use from several threads when
+    a thread pool is used to claim. When a process pool is used to solve, the
+    words, constraints and solver class are pickled for each sentence.
+    """
+
+    def __init__(self,
+                 throne: IronThrone,
+                 claim_executor: Optional[Executor] = None,
+                 solve_executor: Optional[Executor] = None,
+                 window: int = 16):
+        self.throne = throne
+        self.claim_executor = claim_executor
+        self.solve_executor = solve_executor
+        self.window = window
+
+    def tokenize(self) -> Stage:
+        def start(text: Text) -> Sentence:
+            started = monotonic()
+            return Sentence(self.throne.tokenize(text), started)
+
+        return map_stage(start)
+
+    def claim(self) -> Stage:
+        return map_stage(self.throne.claim, self.claim_executor, self.window)
+
+    def cleanup(self) -> Stage:
+        return map_stage(self.throne.cleanup)
+
+    def remaining_budget(self, words: List[Word]) \
+            -> Tuple[List[Word], Optional[float]]:
+        """
+        Time budget left for solving the sentence. Words which don't come
+        from the tokenize stage get the whole budget.
+        """
+
+        time_budget = self.throne.time_budget
+        start = getattr(words, 'start', None)
+
+        if time_budget is not None and start is not None:
+            time_budget -= monotonic() - start
+
+        return words, time_budget
+
+    def solve(self) -> Stage:
+        func = partial(
+            solve_with_budget,
+            constraints=self.throne.constraints,
+            solver_class=self.throne.solver_class,
+            step_budget=self.throne.step_budget,
+        )
+
+        return chain_stages(
+            map_stage(self.remaining_budget),
+            map_stage(func, self.solve_executor, self.window),
+            map_stage(self.throne.record),
+        )
+
+    def stages(self) -> List[Stage]:
+        return [self.tokenize(), self.claim(), self.cleanup(), self.solve()]
+
+    def __call__(self, texts: Iterable[Text]) -> Iterator[Result]:
+        return chain_stages(*self.stages())(texts)
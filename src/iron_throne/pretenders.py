@@ -1,24 +1,55 @@
 from collections import (
     defaultdict,
+    deque,
+)
+from copy import (
+    copy,
+)
+from heapq import (
+    nlargest,
+)
+from sys import (
+    getsizeof,
+)
+from threading import (
+    Lock,
 )
 from typing import (
     Any,
+    Callable,
     Dict,
+    Hashable,
+    Iterable,
     Iterator,
     List,
     NamedTuple,
     Optional,
+    Set,
     Text,
     Tuple,
 )
 
-from iron_throne.claim import (
-    Proof,
+from .cache import (
+    LRUCache,
 )
-
 from .claim import (
     Claim,
 )
+from .columns import (
+    ClaimColumns,
+)
+from .constraints import (
+    Constraint,
+)
+from .memory import (
+    Footprint,
+    MemoryBudgetError,
+    deep_size,
+)
+from .utils import (
+    deletions,
+    edit_distance,
+)
 from .words import (
     Word,
     tokenize,
@@ -51,7 +82,7 @@ class Expression(object):
         self.entity = entity
         self.value = value
 
-        self._words = list(tokenize(text))
+        self._words = list(tokenize(text, interned=True))
 
     def __hash__(self):
         return hash(self.text) ^ hash(self.entity) ^ hash(self.value)
@@ -83,80 +114,1097 @@ class ExpressionMatch(NamedTuple):
 
 TrigramIndex = Dict[
     Tuple[Optional[Text], Optional[Text], Optional[Text]],
-    List[ExpressionMatch]
+    List[Text]
 ]
 
+Vocabulary = Dict[Text, List[ExpressionMatch]]
+
+Changes = List[Tuple[int, Expression]]
+
+Candidate = Tuple[ExpressionMatch, float]
+
+# Estimated size of a memoized candidate: the tuple and its score (the match
+# itself belongs to the index)
+CANDIDATE_BYTES = getsizeof((None, .0)) + getsizeof(.0)
+
+# Objects cached by the interpreter (like the 1-character strings of the
+# trigrams), which are not part of the size of a token or expression
+SHARED_OBJECTS = frozenset(
+    id(x)
+    for x in [None, True, False, *range(-5, 257), *map(chr, range(256))]
+)
+
+# Size of a trigram, which is a tuple of shared characters
+TRIGRAM_BYTES = getsizeof(('a', 'b', 'c'))
+
+# Average size of an entry of a big set, the table of which is never full
+SET_ENTRY_BYTES = getsizeof(set(range(1000))) / 1000
+
+
+class IndexSnapshot(object):
+    """
+    State of the index of an expression pretender at a given time.
+
+    The vocabulary maps each distinct normalized token to its occurrences in
+    the expressions, while the trigram index maps each trigram to the tokens
+    which contain it. This way, a token which appears in thousands of
+    expressions is only scored once.
+
+    A snapshot is never modified once it has been published. Updates are
+    applied to a copy, which shares all the untouched postings with the
+    original, and then the copy replaces the original in one assignment. This
+    way, a request which started with a snapshot keeps a consistent view of
+    the index until it's done.
+
+    Stop trigrams are the trigrams which were pruned from the index to fit
+    in its memory budget. They are never indexed again.
+
+    Each copy has the next generation number, which tells apart the
+    successive snapshots of a pretender without referencing them.
+
+    The size is the estimated size in bytes of the postings, expressions,
+    words and trigrams, without the dictionaries holding them. It is updated
+    along with the postings when the pretender has a memory budget (see
+    `ExpressionPretender.index_size()`).
+    """
+
+    def __init__(self) -> None:
+        self.expressions: Dict[int, Expression] = {}
+        self.seqs: Dict[Expression, List[int]] = {}
+        self.next_seq = 0
+        self.generation = 0
+        self.size = 0
+        self.index: TrigramIndex = {}
+        self.vocabulary: Vocabulary = {}
+        self.stop_trigrams: Set[Any] = set()
+
+    def copy(self) -> 'IndexSnapshot':
+        """
+        Shallow copy of the snapshot. Lists inside the dictionaries are shared,
+        so they must be replaced instead of being modified.
+        """
+
+        out = copy(self)
+        out.generation = self.generation + 1
+        out.expressions = dict(self.expressions)
+        out.seqs = dict(self.seqs)
+        out.index = dict(self.index)
+        out.vocabulary = dict(self.vocabulary)
+
+        return out
+
+
+def update_postings(postings: Dict[Any, List[ExpressionMatch]],
+                    added: Dict[Any, List[ExpressionMatch]],
+                    removed: Set[int]) -> None:
+    """
+    Copy-on-write update of postings lists: the lists of the keys that are
+    present in `added` are replaced by new lists, without the matches whose
+    seq is in `removed` and with the added matches. Other lists are left
+    untouched.
+    """
+
+    for key, matches in added.items():
+        current = [m for m in postings.get(key, []) if m.seq not in removed]
+        current.extend(matches)
+
+        if current:
+            postings[key] = current
+        elif key in postings:
+            del postings[key]
+
+
+def postings_size(postings: Dict[Any, List[Any]], keys: Iterable[Any]) \
+        -> int:
+    """
+    Size of the postings lists of the given keys (the items are counted too,
+    but not what they reference).
+    """
+
+    size = 0
+
+    for key in keys:
+        items = postings.get(key)
+
+        if items is not None:
+            size += getsizeof(items) + sum(getsizeof(x) for x in items)
+
+    return size
+
+
+def unique_size(objects: Iterable[Any], skipped: Set[int]) -> int:
+    """
+    Size of the objects themselves (not what they reference), each object
+    being counted once, skipping the objects whose id is in `skipped` and
+    the `SHARED_OBJECTS`.
+    """
+
+    unique = {id(x): x for x in objects}
+
+    return sum(
+        getsizeof(x)
+        for i, x in unique.items()
+        if i not in skipped and i not in SHARED_OBJECTS
+    )
+
+
+def token_size(word: Word) -> int:
+    """
+    Size of the normalized string and trigram of a word. The words of the
+    expressions are interned, so this is counted once per token.
+
+    The encoded trigrams are left out: they are computed when the trigram is
+    first compared (which the pretenders don't do), so they would change the
+    size of a token while it's indexed.
+    """
+
+    trigram = word.trigram
+
+    # noinspection PyProtectedMember
+    return unique_size(
+        [
+            word.normalized,
+            trigram,
+            vars(trigram),
+            trigram._string,
+            trigram._norm,
+            trigram._words,
+            *trigram._words,
+            word.trigrams,
+        ],
+        set(),
+    ) + len(word.trigrams) * TRIGRAM_BYTES
+
+
+def expression_size(seq: int, expression: Expression) -> int:
+    """
+    Size of an expression, its seq and its words, without what is shared with
+    other expressions: the tokens (see `token_size()`) and the entity.
+    """
+
+    objects = [
+        seq,
+        expression,
+        vars(expression),
+        expression.text,
+        expression.words,
+    ]
+    skipped = set()
+
+    for word in expression.words:
+        objects.extend([word, vars(word), word.text, word.proofs])
+        skipped.add(id(word.normalized))
+
+    size = unique_size(objects, skipped)
+
+    if id(expression.value) not in SHARED_OBJECTS:
+        size += deep_size(expression.value, skipped)
+
+    # Expressions usually have a single seq in their seqs list
+    return size + getsizeof([seq])
+
+
+class CandidateStats(object):
+    """
+    Counts the candidates found and kept by a pretender, to see how much the
+    candidate limits cut (and tune them against accuracy).
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.sentences = 0
+        self.found = 0
+        self.kept = 0
+        self.truncated_words = 0
+        self.truncated_sentences = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def record(self,
+               found: List[List[Candidate]],
+               kept: List[List[Candidate]]) -> None:
+        n_found = sum(len(c) for c in found)
+        n_kept = sum(len(c) for c in kept)
+        truncated = sum(1 for f, k in zip(found, kept) if len(k) < len(f))
+
+        with self.lock:
+            self.sentences += 1
+            self.found += n_found
+            self.kept += n_kept
+            self.truncated_words += truncated
+
+            if n_kept < n_found:
+                self.truncated_sentences += 1
+
+    @property
+    def dropped_ratio(self) -> float:
+        """
+        Fraction of the candidates that were dropped by the limits.
+        """
+
+        if not self.found:
+            return .0
+
+        return float(self.found - self.kept) / float(self.found)
+
+
+def ranking(found: List[List[Candidate]],
+            length: Callable[[Any], int]) \
+        -> Callable[[Candidate], Tuple[bool, float, int]]:
+    """
+    Creates the ranking key of the candidates of a sentence: first whether
+    the expression has a candidate for each of its words (otherwise it can't
+    give a full match), then the score and the length of the expression
+    (as given by `length(match)`).
+    """
+
+    orders: Dict[int, Set[int]] = defaultdict(set)
+
+    for candidates in found:
+        for match, _ in candidates:
+            orders[match.seq].add(match.order)
+
+    def rank(candidate: Candidate) -> Tuple[bool, float, int]:
+        match, score = candidate
+        n = length(match)
+
+        return len(orders[match.seq]) == n, score, n
+
+    return rank
+
+
+class CandidatePretender(Pretender):
+    """
+    Base of the pretenders which find candidates for each word of a sentence
+    and then create the claims of all the candidates at once, so that they
+    all get the same limits, cleanup and scores.
+
+    A candidate is a (match, score) pair, the match having the `seq` of its
+    expression and the `order` of the word within it. Subclasses tell how to
+    get the rest from a match and must have the `max_candidates`,
+    `max_proofs`, `constraints` and `stats` attributes (see
+    `ExpressionPretender`).
+    """
+
+    max_candidates: Optional[int]
+    max_proofs: Optional[int]
+    constraints: List[Constraint]
+    stats: 'CandidateStats'
+
+    def match_key(self, match: Any) -> Hashable:
+        """
+        Identifies the expression of a match: matches with the same key
+        belong to the same claim.
+        """
+
+        raise NotImplementedError
+
+    def match_length(self, match: Any) -> int:
+        """
+        Number of words of the expression of a match.
+        """
+
+        raise NotImplementedError
+
+    def make_claim(self, match: Any, score: float) -> Claim:
+        """
+        Creates the claim of the expression of a match.
+        """
+
+        raise NotImplementedError
+
+    def limit(self, found: List[List[Candidate]]) -> List[List[Candidate]]:
+        """
+        Applies the candidate limits to the candidates of each word of a
+        sentence.
+
+        Candidates of expressions which can still be complete come first,
+        then candidates are ranked by score and by length of the expression.
+        This way, proofs that `FullMatches` would remove anyway are the first
+        to be dropped.
+        """
+
+        kept = found
+
+        if self.max_candidates is not None:
+            rank = ranking(kept, self.match_length)
+            kept = [
+                nlargest(self.max_candidates, candidates, key=rank)
+                if len(candidates) > self.max_candidates else candidates
+                for candidates in kept
+            ]
+
+        if self.max_proofs is not None \
+                and sum(len(c) for c in kept) > self.max_proofs:
+            rank = ranking(kept, self.match_length)
+            positions = [
+                (i, j)
+                for i, candidates in enumerate(kept)
+                for j in range(0, len(candidates))
+            ]
+            best = set(nlargest(
+                self.max_proofs,
+                positions,
+                key=lambda p: rank(kept[p[0]][p[1]]),
+            ))
+            kept = [
+                [c for j, c in enumerate(candidates) if (i, j) in best]
+                for i, candidates in enumerate(kept)
+            ]
+
+        self.stats.record(found, kept)
+
+        return kept
 
-class ExpressionPretender(Pretender):
+    def create_claims(self,
+                      words: List[Word],
+                      found: List[List[Candidate]]) \
+            -> Dict[Hashable, Claim]:
+        """
+        Creates the claims and proofs of the candidates of each word. The
+        candidates are first put in columns so that claim scores and the
+        cleanup of the constraints can be computed without creating objects.
+
+        The score of a claim is the average score of its candidates.
+        """
+
+        columns: ClaimColumns[Hashable] = ClaimColumns(words)
+        first: Dict[Hashable, Any] = {}
+
+        for i, candidates in enumerate(found):
+            for match, score in candidates:
+                key = self.match_key(match)
+
+                if key not in first:
+                    first[key] = match
+
+                claim = columns.claim_id(key, self.match_length(match))
+                columns.append(i, claim, match.order, score)
+
+        scores = columns.claim_scores()
+
+        for constraint in self.constraints:
+            columns = constraint.cleanup_columns(columns)
+
+        return columns.build(
+            lambda key, score: self.make_claim(first[key], score),
+            scores,
+        )
+
+
+class ExpressionPretender(CandidatePretender):
     MIN_SCORE = .6
 
-    def __init__(self, expressions: List[Expression], seq: int = 0):
-        self.expressions = expressions
+    def __init__(self,
+                 expressions: List[Expression],
+                 seq: int = 0,
+                 max_candidates: Optional[int] = None,
+                 max_proofs: Optional[int] = None,
+                 constraints: Optional[List[Constraint]] = None,
+                 cache_size: int = 0,
+                 cache_bytes: Optional[int] = None,
+                 memory_budget: Optional[int] = None,
+                 prune_trigrams: bool = False):
+        """
+        A word can be claimed by at most `max_candidates` expression words
+        and a sentence gets at most `max_proofs` proofs from this pretender,
+        the other candidates are dropped (see `limit()`). Both are unlimited
+        by default.
+
+        The `cleanup_columns()` of the given constraints is applied to the
+        candidates before creating the claims, which avoids creating objects
+        that would be removed by their cleanup anyway. Use the constraints
+        that are given to the `IronThrone`, like `[FullMatches()]`.
+
+        With a `cache_size`, the candidates of the last `cache_size` distinct
+        tokens (using at most `cache_bytes` bytes, if given) are memoized, see
+        `token_candidates()`. The memo is disabled by default.
+
+        With a `memory_budget` (in bytes), adding expressions raises a
+        `MemoryBudgetError` when the index would not fit in it, and the
+        expressions are not added. If `prune_trigrams` is true, the most
+        common trigrams are pruned from the index first (see
+        `prune_stop_trigrams()`), and the error is only raised if that's not
+        enough. The size of the index is updated along with it (see
+        `index_size()`), so checking the budget doesn't walk the index.
+        """
+
         self.seq = seq
+        self.lock = Lock()
+        self.max_candidates = max_candidates
+        self.max_proofs = max_proofs
+        self.constraints = constraints or []
+        self.stats = CandidateStats()
+        self.cache = LRUCache(cache_size, cache_bytes) if cache_size else None
+        self.memory_budget = memory_budget
+        self.prune_trigrams = prune_trigrams
+
+        snapshot = self.create_snapshot()
+        snapshot.next_seq = seq
+        self.snapshot = snapshot
+
+        self.add_expressions(expressions)
+
+    def __getstate__(self):
+        """
+        Pretenders can be pickled (to be saved in a compiled model, for
+        example) along with their index, but not with their lock.
+        """
+
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    @property
+    def expressions(self) -> List[Expression]:
+        return list(self.snapshot.expressions.values())
+
+    @property
+    def index(self) -> TrigramIndex:
+        return self.snapshot.index
+
+    @property
+    def vocabulary(self) -> Vocabulary:
+        return self.snapshot.vocabulary
+
+    def create_snapshot(self) -> IndexSnapshot:
+        """
+        Creates an empty snapshot. Pretenders which need more data in their
+        index can return a sub-class here.
+        """
+
+        return IndexSnapshot()
+
+    def add_expressions(self,
+                        expressions: List[Expression],
+                        seqs: Optional[List[int]] = None) -> None:
+        """
+        Adds expressions to the index. Each expression gets the next seq
+        available, unless seqs are explicitly given (which is useful when a
+        list of expressions is split across several indexes).
+        """
+
+        if seqs is None:
+            seqs = [None] * len(expressions)
+
+        with self.lock:
+            snapshot = self.snapshot.copy()
+            added: Changes = []
 
-        self.index: TrigramIndex = self.build_index()
+            for expression, seq in zip(expressions, seqs):
+                if seq is None:
+                    seq = snapshot.next_seq
 
-    def build_index(self) -> TrigramIndex:
-        index: TrigramIndex = defaultdict(lambda: [])
+                snapshot.next_seq = max(snapshot.next_seq, seq + 1)
+                snapshot.expressions[seq] = expression
+                snapshot.seqs[expression] = \
+                    snapshot.seqs.get(expression, []) + [seq]
+                added.append((seq, expression))
 
-        for seq, expression in enumerate(self.expressions):
+            self.update(snapshot, added, [])
+
+            if self.memory_budget is not None:
+                self.check_budget(snapshot)
+
+            self.publish(snapshot)
+
+    def remove_expressions(self, expressions: List[Expression]) -> None:
+        """
+        Removes expressions from the index. Unknown expressions are ignored.
+        The seqs of other expressions don't change.
+        """
+
+        with self.lock:
+            snapshot = self.snapshot.copy()
+            removed: Changes = []
+
+            for expression in expressions:
+                for seq in snapshot.seqs.pop(expression, []):
+                    del snapshot.expressions[seq]
+                    removed.append((seq, expression))
+
+            self.update(snapshot, [], removed)
+            self.publish(snapshot)
+
+    def publish(self, snapshot: IndexSnapshot) -> None:
+        """
+        Replaces the current snapshot. The entries of the memo were computed
+        from the previous one, so they are dropped.
+        """
+
+        self.snapshot = snapshot
+
+        if self.cache is not None:
+            self.cache.clear()
+
+    def update(self,
+               snapshot: IndexSnapshot,
+               added: Changes,
+               removed: Changes) -> None:
+        """
+        Updates the postings of the snapshot (which is not published yet) to
+        reflect the added and removed expressions. Tokens only enter (or
+        leave) the trigram index when their first occurrence is added (or
+        their last one removed).
+        """
+
+        removed_seqs = set(seq for seq, _ in removed)
+        vocabulary: Vocabulary = defaultdict(lambda: [])
+        touched: Dict[Text, Word] = {}
+
+        for seq, expression in removed:
+            for word in expression.words:
+                if word.normalized:
+                    vocabulary[word.normalized] = []
+                    touched[word.normalized] = word
+
+        for seq, expression in added:
             for order, word in enumerate(expression.words):
+                if word.normalized:
+                    match = ExpressionMatch(expression, word, seq, order)
+                    vocabulary[word.normalized].append(match)
+                    touched[word.normalized] = word
+
+        known = set(t for t in touched if t in snapshot.vocabulary)
+        track = self.memory_budget is not None
+        size = 0
+
+        if track:
+            size -= postings_size(snapshot.vocabulary, touched)
+
+        update_postings(snapshot.vocabulary, vocabulary, removed_seqs)
+
+        if track:
+            size += postings_size(snapshot.vocabulary, touched)
+
+        new_tokens: Dict[Any, List[Text]] = defaultdict(lambda: [])
+        gone_tokens: Dict[Any, Set[Text]] = defaultdict(set)
+        entered: List[Word] = []
+        left: List[Word] = []
+
+        for token, word in touched.items():
+            present = token in snapshot.vocabulary
+
+            if present and token not in known:
+                entered.append(word)
+
+                for t in word.trigrams:
+                    new_tokens[t].append(token)
+            elif not present and token in known:
+                left.append(word)
+
                 for t in word.trigrams:
-                    index[t].append(ExpressionMatch(
-                        expression,
-                        word,
-                        self.seq + seq,
-                        order,
-                    ))
+                    gone_tokens[t].add(token)
+
+        for t in set(new_tokens) | set(gone_tokens):
+            if t in snapshot.stop_trigrams:
+                continue
+
+            gone = gone_tokens.get(t, set())
+            current = snapshot.index.get(t, [])
+            tokens = [x for x in current if x not in gone]
+            tokens.extend(new_tokens.get(t, []))
+            size -= getsizeof(current) if t in snapshot.index else 0
 
-        return index
+            if tokens:
+                snapshot.index[t] = tokens
+                size += getsizeof(tokens)
+            else:
+                snapshot.index.pop(t, None)
 
-    def claim_word(self, word: Word, claims: Dict[Expression, Claim]) -> None:
-        matches: Dict[ExpressionMatch, int] = defaultdict(lambda: 0)
+        if track:
+            size += sum(token_size(word) for word in entered)
+            size -= sum(token_size(word) for word in left)
+            size += sum(expression_size(*change) for change in added)
+            size -= sum(expression_size(*change) for change in removed)
+            snapshot.size += size
+
+    def footprint(self,
+                  snapshot: Optional[IndexSnapshot] = None,
+                  seen: Optional[Set[int]] = None) -> Footprint:
+        """
+        Memory used by the index (see `Footprint`). Objects whose id is in
+        `seen` are not counted, which allows to measure several pretenders
+        without counting their shared objects twice.
+
+        This walks the whole index, so it takes about as long as a copy of it.
+        """
+
+        if snapshot is None:
+            snapshot = self.snapshot
+
+        if seen is None:
+            seen = set()
+
+        words = [
+            word
+            for expression in snapshot.expressions.values()
+            for word in expression.words
+        ]
+        trigrams = sum(deep_size(word.trigram, seen) for word in words)
+        words_size = sum(deep_size(word, seen) for word in words)
+        expressions = (
+            deep_size(snapshot.expressions, seen)
+            + deep_size(snapshot.seqs, seen)
+        )
+        postings = deep_size(snapshot, seen)
+
+        return Footprint(
+            postings=postings,
+            expressions=expressions,
+            words=words_size,
+            trigrams=trigrams,
+            cache=self.cache.bytes if self.cache is not None else 0,
+        )
+
+    def index_size(self, snapshot: IndexSnapshot) -> int:
+        """
+        Estimated size of the index, which is close to `footprint().index`
+        but doesn't walk the index: the size of the postings, expressions,
+        words and trigrams is updated along with them, only the size of the
+        dictionaries holding them is computed here. The size is only tracked
+        by pretenders with a memory budget, since it slows indexing down.
+
+        Pretenders with more data in their index add its size here.
+        """
+
+        return snapshot.size + sum(getsizeof(x) for x in [
+            snapshot,
+            vars(snapshot),
+            snapshot.expressions,
+            snapshot.seqs,
+            snapshot.index,
+            snapshot.vocabulary,
+            snapshot.stop_trigrams,
+        ])
+
+    def check_budget(self, snapshot: IndexSnapshot) -> None:
+        """
+        Makes sure that the snapshot fits in the memory budget, pruning stop
+        trigrams if allowed. Raises a `MemoryBudgetError` otherwise.
+        """
+
+        size = self.index_size(snapshot)
+
+        while size > self.memory_budget \
+                and self.prune_trigrams and snapshot.index:
+            self.prune_stop_trigrams(snapshot, size - self.memory_budget)
+            size = self.index_size(snapshot)
+
+        if size > self.memory_budget:
+            raise MemoryBudgetError(
+                f'Index needs {size} bytes but its budget is '
+                f'{self.memory_budget} bytes'
+            )
+
+    def prune_stop_trigrams(self, snapshot: IndexSnapshot, excess: int) \
+            -> None:
+        """
+        Removes the trigrams shared by the most tokens from the trigram index
+        until about `excess` bytes are freed. Those trigrams are the least
+        useful to tell tokens apart, like stop words.
+
+        Pruning a trigram frees its tokens list and its entry in the index,
+        but adds an entry to the stop trigrams. Entries are estimated from
+        the average entry of each table (see `SET_ENTRY_BYTES`).
+
+        Exact matches are not affected, but fuzzy matches of the tokens which
+        had pruned trigrams score lower (or are not found anymore).
+        """
+
+        common = sorted(
+            snapshot.index.items(),
+            key=lambda item: len(item[1]),
+            reverse=True,
+        )
+        entry = getsizeof(snapshot.index) / len(snapshot.index)
+        stop = set()
+        freed = 0
+
+        for t, tokens in common:
+            if freed >= excess:
+                break
+
+            stop.add(t)
+            freed += getsizeof(tokens) + entry - SET_ENTRY_BYTES
+            snapshot.size -= getsizeof(tokens)
+
+        # Rebuilt rather than popped, since dictionaries don't shrink
+        snapshot.index = {
+            t: tokens
+            for t, tokens in snapshot.index.items()
+            if t not in stop
+        }
+        snapshot.stop_trigrams = snapshot.stop_trigrams | stop
+
+    def candidates(self,
+                   word: Word,
+                   snapshot: Optional[IndexSnapshot] = None) \
+            -> Iterator[Tuple[ExpressionMatch, float]]:
+        """
+        Yields all the expression words that match the given word along with
+        their score.
+
+        If the word exactly matches some expression words then only those are
+        returned, since nothing found by fuzzy matching could score better.
+        """
+
+        if snapshot is None:
+            snapshot = self.snapshot
+
+        exact = snapshot.vocabulary.get(word.normalized)
+
+        if exact:
+            for match in exact:
+                yield match, 1.
+        else:
+            yield from self.fuzzy_candidates(word, snapshot)
+
+    def token_candidates(self, word: Word, snapshot: IndexSnapshot) \
+            -> List[Candidate]:
+        """
+        Same as `candidates()`, through the memo of the pretender if it has
+        one. Candidates only depend on the normalized token and on the
+        snapshot, so conversations that repeat the same words skip the
+        trigram lookups.
+
+        The memo is cleared when a new snapshot is published, and entries
+        are tagged with the generation of the snapshot they were computed
+        from, so that a request still running on the previous snapshot can't
+        serve (or store) stale candidates. The memo only holds the matches:
+        claims and proofs are still created for each sentence.
+        """
+
+        if self.cache is None:
+            return list(self.candidates(word, snapshot))
+
+        key = word.normalized
+        entry = self.cache.get(key)
+
+        if entry is not None and entry[0] == snapshot.generation:
+            return list(entry[1])
+
+        found = tuple(self.candidates(word, snapshot))
+        size = (
+            getsizeof(key)
+            + getsizeof(found)
+            + len(found) * CANDIDATE_BYTES
+        )
+        self.cache.put(key, (snapshot.generation, found), size)
+
+        return list(found)
+
+    def fuzzy_candidates(self, word: Word, snapshot: IndexSnapshot) \
+            -> Iterator[Tuple[ExpressionMatch, float]]:
+        """
+        Matches the word against expression words using trigram similarity.
+        """
+
+        counts: Dict[Text, int] = defaultdict(lambda: 0)
         len2 = float(len(word.trigrams))
 
         for t in word.trigrams:
-            for match in self.index[t]:
-                matches[match] += 1
+            for token in snapshot.index.get(t, []):
+                counts[token] += 1
 
-        def compute_scores() -> Iterator[Tuple[ExpressionMatch, float]]:
-            for m, count in matches.items():
-                count = float(count)
-                len1 = float(len(m.word.trigrams))
-                s = count / (len1 + len2 - count)
+        for token, count in counts.items():
+            matches = snapshot.vocabulary[token]
+            count = float(count)
+            len1 = float(len(matches[0].word.trigrams))
+            s = count / (len1 + len2 - count)
 
-                if s > self.MIN_SCORE:
+            if s > self.MIN_SCORE:
+                for m in matches:
                     yield m, s
 
-        for match, score in compute_scores():
-            claim = self.get_claim(claims, match)
-            Proof.attach(
-                order=match.order,
-                claim=claim,
-                word=word,
-                score=score,
-            )
+    def match_key(self, match: ExpressionMatch) -> Expression:
+        return match.expression
 
-    def get_claim(self,
-                  claims: Dict[Expression, Claim],
-                  match: ExpressionMatch) -> Claim:
-        if match.expression not in claims:
-            claims[match.expression] = Claim(
-                entity=match.expression.entity,
-                value=match.expression.value,
-                score=0,
-                length=len(match.expression.words),
-                seq=match.seq,
-            )
+    def match_length(self, match: ExpressionMatch) -> int:
+        return len(match.expression.words)
+
+    def make_claim(self, match: ExpressionMatch, score: float) -> Claim:
+        return Claim(
+            entity=match.expression.entity,
+            value=match.expression.value,
+            score=score,
+            length=len(match.expression.words),
+            seq=match.seq,
+        )
+
+    def claim(self, words: List[Word]) -> None:
+        snapshot = self.snapshot
+        found = [self.token_candidates(word, snapshot) for word in words]
+
+        self.create_claims(words, self.limit(found))
+
+
+class ShortWordSnapshot(IndexSnapshot):
+    def __init__(self) -> None:
+        super().__init__()
+        self.deletions: Dict[Text, Set[Text]] = {}
+
+    def copy(self) -> 'ShortWordSnapshot':
+        out = super().copy()
+        out.deletions = dict(self.deletions)
+
+        return out
+
+
+class ShortWordPretender(ExpressionPretender):
+    """
+    Trigrams are bad at comparing short words: a single typo in a 3-letter
+    word removes all the trigrams it has in common with the right spelling.
+    This pretender works like the expression pretender, except that short
+    words are looked up using a symmetric deletion index (as in SymSpell)
+    and scored from their edit distance.
+
+    Use it instead of the `ExpressionPretender`, not alongside, otherwise the
+    claims would be duplicated.
+
+    Edit scores have their own threshold, `MIN_EDIT_SCORE`: a typo in a
+    2-letter word scores .5, which the trigram threshold would reject.
+    """
+
+    MAX_LENGTH = 3
+    MAX_DISTANCE = 1
+    MIN_EDIT_SCORE = .5
+
+    def create_snapshot(self) -> ShortWordSnapshot:
+        return ShortWordSnapshot()
+
+    def update(self,
+               snapshot: ShortWordSnapshot,
+               added: Changes,
+               removed: Changes) -> None:
+        """
+        Indexes the deletions of all the vocabulary words that are short
+        enough to be at `MAX_DISTANCE` of a short word. Words that left the
+        vocabulary are removed from the deletions index.
+        """
+
+        super().update(snapshot, added, removed)
+
+        max_length = self.MAX_LENGTH + self.MAX_DISTANCE
+        size = 0
+        touched = set(
+            word.normalized
+            for _, expression in added + removed
+            for word in expression.words
+            if 0 < len(word.normalized) <= max_length
+        )
+
+        for norm in touched:
+            present = norm in snapshot.vocabulary
+
+            for d in deletions(norm, self.MAX_DISTANCE):
+                current = snapshot.deletions.get(d)
+                found = set(current or ())
+
+                if present:
+                    found.add(norm)
+                else:
+                    found.discard(norm)
+
+                if current is not None:
+                    size -= getsizeof(d) + getsizeof(current)
+
+                if found:
+                    snapshot.deletions[d] = found
+                    size += getsizeof(d) + getsizeof(found)
+                else:
+                    snapshot.deletions.pop(d, None)
+
+        if self.memory_budget is not None:
+            snapshot.size += size
+
+    def index_size(self, snapshot: ShortWordSnapshot) -> int:
+        return super().index_size(snapshot) + getsizeof(snapshot.deletions)
+
+    def fuzzy_candidates(self, word: Word, snapshot: ShortWordSnapshot) \
+            -> Iterator[Tuple[ExpressionMatch, float]]:
+        """
+        Long words go through the trigram index while short ones have their
+        deletions looked up. The number of deletions only depends on
+        `MAX_LENGTH` and `MAX_DISTANCE`, so the lookup is bounded.
+        """
+
+        norm = word.normalized
+
+        if len(norm) > self.MAX_LENGTH:
+            yield from super().fuzzy_candidates(word, snapshot)
+            return
+
+        found: Set[Text] = set()
+
+        for d in deletions(norm, self.MAX_DISTANCE):
+            found.update(snapshot.deletions.get(d, ()))
+
+        for other in found:
+            distance = edit_distance(norm, other)
+
+            # A word must keep at least one letter of the other, otherwise
+            # "a" would match all the 2-letter words that contain an "a"
+            if distance > self.MAX_DISTANCE \
+                    or distance >= min(len(norm), len(other)):
+                continue
+
+            score = 1. - float(distance) / float(max(len(norm), len(other)))
+
+            if score >= self.MIN_EDIT_SCORE:
+                for match in snapshot.vocabulary[other]:
+                    yield match, score
 
-        return claims[match.expression]
+
+class SequenceSnapshot(IndexSnapshot):
+    def __init__(self) -> None:
+        super().__init__()
+        self.goto: List[Dict[Text, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[int, Expression]]] = [[]]
+        self.automaton_size = 0
+
+
+class SequencePretender(ExpressionPretender):
+    """
+    Variant of the expression pretender for catalogs with a lot of multi-word
+    expressions (city names, wine appellations and so on).
+
+    An Aho-Corasick automaton is built over the normalized words of the
+    expressions, so that all the exact occurrences of expressions in the
+    sentence are found in a single pass and claimed as a whole. Only the words
+    that are not part of any exact occurrence go through the word-by-word
+    matching of the expression pretender.
+
+    The failure links of the automaton depend on the whole set of
+    expressions, so the automaton is rebuilt when expressions are added or
+    removed (the trigram postings are still updated incrementally).
+    """
+
+    def create_snapshot(self) -> SequenceSnapshot:
+        return SequenceSnapshot()
+
+    def update(self,
+               snapshot: SequenceSnapshot,
+               added: Changes,
+               removed: Changes) -> None:
+        super().update(snapshot, added, removed)
+        self.build_automaton(snapshot)
+
+    def build_automaton(self, snapshot: SequenceSnapshot) -> None:
+        """
+        Builds the trie of expressions and then computes the failure links
+        breadth-first, merging the outputs of each node with the ones of the
+        node its failure link points to.
+        """
+
+        goto: List[Dict[Text, int]] = [{}]
+        fail: List[int] = [0]
+        outputs: List[List[Tuple[int, Expression]]] = [[]]
+
+        for seq, expression in snapshot.expressions.items():
+            if not expression.words:
+                continue
+
+            node = 0
+
+            for word in expression.words:
+                nxt = goto[node].get(word.normalized)
+
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][word.normalized] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    outputs.append([])
+
+                node = nxt
+
+            outputs[node].append((seq, expression))
+
+        queue = deque(goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+
+            for token, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+
+                while f and token not in goto[f]:
+                    f = fail[f]
+
+                fail[child] = goto[f].get(token, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        snapshot.goto = goto
+        snapshot.fail = fail
+        snapshot.outputs = outputs
+
+        if self.memory_budget is None:
+            return
+
+        # Measured now since it was entirely rebuilt anyway, without the
+        # expressions and tokens that it references
+        seen = set(SHARED_OBJECTS)
+        seen.update(id(x) for x in snapshot.expressions.values())
+        seen.update(id(x) for x in snapshot.vocabulary)
+        snapshot.automaton_size = deep_size((goto, fail, outputs), seen)
+
+    def index_size(self, snapshot: SequenceSnapshot) -> int:
+        return super().index_size(snapshot) + snapshot.automaton_size
+
+    def find_sequences(self,
+                       words: List[Word],
+                       snapshot: Optional[SequenceSnapshot] = None) \
+            -> Iterator[Tuple[int, int, Expression]]:
+        """
+        Yields the (position of the last word, seq, expression) of all exact
+        occurrences of expressions in the words.
+        """
+
+        if snapshot is None:
+            snapshot = self.snapshot
+
+        node = 0
+
+        for i, word in enumerate(words):
+            token = word.normalized
+
+            while node and token not in snapshot.goto[node]:
+                node = snapshot.fail[node]
+
+            node = snapshot.goto[node].get(token, 0)
+
+            for seq, expression in snapshot.outputs[node]:
+                yield i, seq, expression
 
     def claim(self, words: List[Word]) -> None:
-        claims: Dict[Expression, Claim] = {}
+        snapshot = self.snapshot
+        found: List[List[Candidate]] = [[] for _ in words]
+        covered: Set[int] = set()
+
+        for end, seq, expression in self.find_sequences(words, snapshot):
+            start = end - len(expression.words) + 1
+
+            for order, word in enumerate(expression.words):
+                match = ExpressionMatch(expression, word, seq, order)
+                found[start + order].append((match, 1.))
+                covered.add(start + order)
 
-        for word in words:
-            self.claim_word(word, claims)
+        for i, word in enumerate(words):
+            if i not in covered:
+                found[i] = self.token_candidates(word, snapshot)
 
-        for claim in claims.values():
-            total = sum(p.score for p in claim.proofs)
-            claim.score = float(total) / float(len(claim.proofs))
+        self.create_claims(words, self.limit(found))
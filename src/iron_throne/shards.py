@@ -0,0 +1,290 @@
+"""
+Splitting the index of expressions across several shards, possibly living
+in other processes, in order to reduce the memory needed by each worker.
+"""
+from multiprocessing import (
+    Pipe,
+    Process,
+)
+from multiprocessing.connection import (
+    Connection,
+)
+from threading import (
+    Lock,
+)
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Text,
+    Tuple,
+    Type,
+)
+from zlib import (
+    crc32,
+)
+
+from .claim import (
+    Claim,
+)
+from .constraints import (
+    Constraint,
+)
+from .pretenders import (
+    CandidatePretender,
+    CandidateStats,
+    Expression,
+    ExpressionPretender,
+)
+from .words import (
+    Word,
+)
+
+
+class ShardMatch(NamedTuple):
+    """
+    Match of a word found by a shard. It carries everything needed to create
+    the claim, so the sharded pretender doesn't have to keep the expressions.
+    """
+
+    seq: int
+    order: int
+    score: float
+    text: Text
+    entity: Text
+    value: Any
+    length: int
+
+
+# For each word: whether matches are exact and the list of matches
+ShardResult = List[Tuple[bool, List[ShardMatch]]]
+
+
+def lookup(pretender: ExpressionPretender, texts: List[Text]) -> ShardResult:
+    """
+    Finds the candidates of all the words in a pretender. Exact and fuzzy
+    matches are told apart, so that results from several shards can be
+    merged the same way `ExpressionPretender.candidates()` does.
+    """
+
+    snapshot = pretender.snapshot
+    out: ShardResult = []
+
+    for text in texts:
+        word = Word(text)
+        exact = snapshot.vocabulary.get(word.normalized)
+
+        if exact:
+            found = [(m, 1.) for m in exact]
+        else:
+            found = list(pretender.fuzzy_candidates(word, snapshot))
+
+        out.append((bool(exact), [
+            ShardMatch(
+                seq=m.seq,
+                order=m.order,
+                score=score,
+                text=m.expression.text,
+                entity=m.expression.entity,
+                value=m.expression.value,
+                length=len(m.expression.words),
+            )
+            for m, score in found
+        ]))
+
+    return out
+
+
+class Shard(object):
+    """
+    A shard which lives in the current process. Queries are split in
+    `send()` and `receive()` so that all the shards can work at the same time
+    when they live in other processes.
+    """
+
+    def __init__(self,
+                 expressions: List[Expression],
+                 seqs: List[int],
+                 pretender_class: Type[ExpressionPretender]):
+        self.pretender = pretender_class([])
+        self.pretender.add_expressions(expressions, seqs)
+        self.result: ShardResult = []
+
+    def send(self, texts: List[Text]) -> None:
+        self.result = lookup(self.pretender, texts)
+
+    def receive(self) -> ShardResult:
+        return self.result
+
+    def close(self) -> None:
+        pass
+
+
+def serve_shard(conn: Connection,
+                expressions: List[Expression],
+                seqs: List[int],
+                pretender_class: Type[ExpressionPretender]) -> None:
+    """
+    Main loop of a shard process: builds the index and then answers queries
+    until `None` is received.
+    """
+
+    pretender = pretender_class([])
+    pretender.add_expressions(expressions, seqs)
+    del expressions
+
+    while True:
+        texts = conn.recv()
+
+        if texts is None:
+            break
+
+        conn.send(lookup(pretender, texts))
+
+    conn.close()
+
+
+class ProcessShard(object):
+    """
+    A shard which lives in a child process and talks through a pipe.
+    """
+
+    def __init__(self,
+                 expressions: List[Expression],
+                 seqs: List[int],
+                 pretender_class: Type[ExpressionPretender]):
+        self.conn, child_conn = Pipe()
+        self.process = Process(
+            target=serve_shard,
+            args=(child_conn, expressions, seqs, pretender_class),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def send(self, texts: List[Text]) -> None:
+        self.conn.send(texts)
+
+    def receive(self) -> ShardResult:
+        return self.conn.recv()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+
+        self.conn.close()
+        self.process.join()
+
+
+class ShardedPretender(CandidatePretender):
+    """
+    Gives the same claims as an `ExpressionPretender` built with the same
+    expressions, but the expressions are partitioned into several shards,
+    which can live in child processes. Each process then only has to hold
+    its part of the index.
+
+    By default expressions are distributed round-robin, which gives shards of
+    equal size. A `key` function can be given instead (like
+    `lambda e: e.entity`), in which case expressions with the same key end up
+    in the same shard.
+
+    The candidate limits and constraints are applied to the merged matches,
+    like `ExpressionPretender` does (see its options).
+    """
+
+    def __init__(self,
+                 expressions: List[Expression],
+                 shards: int = 2,
+                 seq: int = 0,
+                 key: Optional[Callable[[Expression], Hashable]] = None,
+                 processes: bool = True,
+                 pretender_class: Type[ExpressionPretender] =
+                 ExpressionPretender,
+                 max_candidates: Optional[int] = None,
+                 max_proofs: Optional[int] = None,
+                 constraints: Optional[List[Constraint]] = None):
+        parts: List[Tuple[List[Expression], List[int]]] = [
+            ([], []) for _ in range(0, shards)
+        ]
+
+        for i, expression in enumerate(expressions):
+            if key is None:
+                n = i % shards
+            else:
+                n = crc32(repr(key(expression)).encode()) % shards
+
+            parts[n][0].append(expression)
+            parts[n][1].append(seq + i)
+
+        shard_class = ProcessShard if processes else Shard
+        self.shards = [
+            shard_class(part, seqs, pretender_class)
+            for part, seqs in parts
+        ]
+        self.lock = Lock()
+        self.max_candidates = max_candidates
+        self.max_proofs = max_proofs
+        self.constraints = constraints or []
+        self.stats = CandidateStats()
+
+    def close(self) -> None:
+        """
+        Stops the shard processes, if any.
+        """
+
+        for shard in self.shards:
+            shard.close()
+
+    def query(self, texts: List[Text]) -> List[List[ShardMatch]]:
+        """
+        Sends the words to all shards at once, then merges their answers. If
+        any shard found an exact match for a word, only exact matches are
+        kept for this word.
+        """
+
+        with self.lock:
+            for shard in self.shards:
+                shard.send(texts)
+
+            results = [shard.receive() for shard in self.shards]
+
+        out = []
+
+        for answers in zip(*results):
+            if any(exact for exact, _ in answers):
+                answers = [a for a in answers if a[0]]
+
+            out.append(sorted(
+                (m for _, matches in answers for m in matches),
+                key=lambda m: (m.seq, m.order),
+            ))
+
+        return out
+
+    def match_key(self, match: ShardMatch) -> Tuple[Text, Text, Any]:
+        return match.text, match.entity, match.value
+
+    def match_length(self, match: ShardMatch) -> int:
+        return match.length
+
+    def make_claim(self, match: ShardMatch, score: float) -> Claim:
+        return Claim(
+            entity=match.entity,
+            value=match.value,
+            score=score,
+            length=match.length,
+            seq=match.seq,
+        )
+
+    def claim(self, words: List[Word]) -> None:
+        found = [
+            [(m, m.score) for m in matches]
+            for matches in self.query([w.text for w in words])
+        ]
+
+        self.create_claims(words, self.limit(found))
@@ -0,0 +1,740 @@
+"""
+Simulated annealing solver. The annealing loop is implemented here rather
+than relying on a generic library because the states are tiny (one integer
+per word) and the overhead of a generic loop (deep copies of the state,
+progress output) would dominate.
+"""
+from collections import (
+    defaultdict,
+    deque,
+)
+from concurrent.futures import (
+    Executor,
+)
+from functools import (
+    lru_cache,
+)
+from math import (
+    exp,
+    log,
+)
+from random import (
+    Random,
+)
+from threading import (
+    Lock,
+)
+from time import (
+    monotonic,
+    perf_counter,
+)
+from typing import (
+    Any,
+    ClassVar,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Text,
+    Tuple,
+    Type,
+)
+from uuid import (
+    uuid4,
+)
+from weakref import (
+    WeakValueDictionary,
+)
+
+from .claim import (
+    Proof,
+)
+from .constraints import (
+    Constraint,
+)
+from .words import (
+    Word,
+)
+
+State = List[Optional[int]]
+
+# (step, temperature, energy) samples of a run
+Trajectory = List[Tuple[int, float, float]]
+
+
+@lru_cache(maxsize=64)
+def schedule(t_max: float, t_min: float, steps: int) -> Tuple[float, ...]:
+    """
+    Temperature at each step of an exponential cooling from `t_max` to
+    `t_min`. Tables are cached since a lot of sentences share the same
+    bounds.
+    """
+
+    if t_min <= 0.0:
+        raise ValueError('Exponential cooling requires a minimum temperature '
+                         'greater than zero')
+
+    factor = -log(t_max / t_min)
+
+    return tuple(
+        t_max * exp(factor * step / steps)
+        for step in range(1, steps + 1)
+    )
+
+
+class Annealer(object):
+    """
+    Minimal simulated annealing loop.
+
+    Sub-classes implement `move()`, which changes the state in place and
+    returns what `undo()` needs to revert the change (or `None` if nothing
+    changed), and `energy()`. The state is only copied when a new best state
+    is found.
+    """
+
+    Tmax = 25000.0
+    Tmin = 2.5
+    steps = 50000
+
+    # Number of samples of the trajectory, when it is recorded
+    TRAJECTORY_POINTS = 50
+
+    def __init__(self, initial_state: State):
+        self.state: State = list(initial_state)
+        self.best_state: Optional[State] = None
+        self.best_energy: Optional[float] = None
+        self.best_step = 0
+        self.user_exit = False
+        self.random = Random()
+
+        self.accepted = 0
+        self.rejected = 0
+        self.trajectory: Optional[Trajectory] = None
+
+    def move(self) -> Any:
+        raise NotImplementedError
+
+    def undo(self, change: Any) -> None:
+        raise NotImplementedError
+
+    def energy(self) -> float:
+        raise NotImplementedError
+
+    def anneal(self) -> Tuple[State, float]:
+        """
+        Minimizes the energy, starting from the current state. Returns the
+        best state and energy found, the best state also becomes the current
+        state.
+        """
+
+        rand = self.random.random
+        trajectory = self.trajectory
+        interval = max(1, self.steps // self.TRAJECTORY_POINTS)
+        e = self.energy()
+
+        self.best_state = self.state[:]
+        self.best_energy = e
+
+        for step, t in enumerate(schedule(self.Tmax, self.Tmin, self.steps)):
+            if trajectory is not None and step % interval == 0:
+                trajectory.append((step, t, e))
+
+            change = self.move()
+
+            if self.user_exit:
+                break
+
+            if change is None:
+                continue
+
+            new_e = self.energy()
+            de = new_e - e
+
+            if de > 0.0 and exp(-de / t) < rand():
+                self.undo(change)
+                self.rejected += 1
+            else:
+                e = new_e
+                self.accepted += 1
+
+                if e < self.best_energy:
+                    self.best_state = self.state[:]
+                    self.best_energy = e
+                    self.best_step = step
+
+        self.state = self.best_state[:]
+        return self.best_state, self.best_energy
+
+
+class RunProfile(NamedTuple):
+    """
+    What happened during one annealing, see `IronThroneSolver`. Timings are
+    in seconds, in the same order as the constraints.
+    """
+
+    constraints: List[Text]
+    timings: List[float]
+    energy_calls: int
+    accepted: int
+    rejected: int
+    steps: int
+    best_step: int
+    best_energy: float
+    t_min: float
+    t_max: float
+    exhausted: bool
+    trajectory: Trajectory
+    profiler: Text = ''
+
+
+class Profiler(object):
+    """
+    Aggregates the profiles of many annealings, to know which constraints
+    cost the most and whether the schedule suits the traffic:
+
+    - If the best state is found early, there are more steps than needed
+    - A low acceptance ratio means that the temperature is too low for the
+      energies at stake, and a high one that it's too high
+
+    The profiler is shared between threads. When it is sent to another
+    process (like the solvers of a `Pipeline` with a process pool), the copy
+    doesn't record anything: the profiles come back in the `Result` of
+    `solve()` and `IronThrone.record()` gives them to the original profiler
+    with `forward()`.
+    """
+
+    # Number of runs for which the trajectory is kept
+    KEEP_RUNS = 100
+
+    # Profilers of this process, by key
+    registry: ClassVar['WeakValueDictionary[Text, Profiler]'] = \
+        WeakValueDictionary()
+
+    def __init__(self):
+        self.key = uuid4().hex
+        self.remote = False
+        self.registry[self.key] = self
+        self.clear()
+
+    def __getstate__(self):
+        """
+        Copies only keep the key of the original profiler, the aggregates
+        stay with the original.
+        """
+
+        return {'key': self.key}
+
+    def __setstate__(self, state):
+        self.key = state['key']
+        self.remote = True
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Forgets all the recorded profiles.
+        """
+
+        self.lock = Lock()
+        self.runs = 0
+        self.exhausted = 0
+        self.energy_calls = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.steps = 0
+        self.best_steps = 0
+        self.timings: Dict[Text, float] = defaultdict(lambda: .0)
+        self.recent: Deque[RunProfile] = deque(maxlen=self.KEEP_RUNS)
+
+    @classmethod
+    def forward(cls, run: RunProfile) -> None:
+        """
+        Records a profile made by a copy of a profiler into the original one,
+        if it lives in this process.
+        """
+
+        profiler = cls.registry.get(run.profiler)
+
+        if profiler is not None and not profiler.remote:
+            profiler.record(run)
+
+    def record(self, run: RunProfile) -> None:
+        if self.remote:
+            return
+
+        with self.lock:
+            self.runs += 1
+            self.exhausted += int(run.exhausted)
+            self.energy_calls += run.energy_calls
+            self.accepted += run.accepted
+            self.rejected += run.rejected
+            self.steps += run.steps
+            self.best_steps += run.best_step
+            self.recent.append(run)
+
+            for name, timing in zip(run.constraints, run.timings):
+                self.timings[name] += timing
+
+    @property
+    def acceptance_ratio(self) -> float:
+        moves = self.accepted + self.rejected
+
+        if not moves:
+            return .0
+
+        return float(self.accepted) / float(moves)
+
+    @property
+    def best_step_ratio(self) -> float:
+        """
+        Average position of the best state in the schedule, from 0 (first
+        step) to 1 (last step).
+        """
+
+        if not self.steps:
+            return .0
+
+        return float(self.best_steps) / float(self.steps)
+
+    def report(self) -> Text:
+        """
+        Human-readable summary of the profiles.
+        """
+
+        with self.lock:
+            total = sum(self.timings.values())
+            calls = max(1, self.energy_calls)
+            lines = [
+                f'{self.runs} runs, {self.exhausted} out of budget',
+                f'{self.accepted + self.rejected} moves, '
+                f'{self.acceptance_ratio:.1%} accepted',
+                f'best state found at {self.best_step_ratio:.1%} '
+                f'of the schedule on average',
+                '',
+                f'{"constraint":<20} {"total":>10} {"per call":>10} '
+                f'{"share":>7}',
+            ]
+
+            for name, timing in sorted(self.timings.items(),
+                                       key=lambda x: -x[1]):
+                share = timing / total if total else .0
+                lines.append(
+                    f'{name:<20} {timing:>9.3f}s '
+                    f'{timing / calls * 1e6:>8.1f}µs {share:>7.1%}'
+                )
+
+        return '\n'.join(lines)
+
+
+class IronThroneSolver(Annealer):
+    MAX_ATTENUATION = 0.9
+
+    def __init__(self,
+                 words: List[Word],
+                 constraints: List[Constraint],
+                 time_budget: Optional[float] = None,
+                 step_budget: Optional[int] = None,
+                 profiler: Optional['Profiler'] = None):
+        """
+        The annealing stops early (keeping the best state found so far) when
+        it has been running for `time_budget` seconds or has made
+        `step_budget` moves. In that case, `exhausted` is set to `True`.
+
+        If a profiler is given, the time spent in the energy of each
+        constraint and the trajectory of the energy are recorded and sent to
+        the profiler at the end of `anneal()`. Use `functools.partial()` to
+        give it to the `IronThrone`.
+        """
+
+        super().__init__([None] * len(words))
+
+        self.profiler = profiler
+        self.timings: Optional[List[float]] = None
+        self.energy_calls = 0
+
+        if profiler is not None:
+            self.timings = [.0] * len(constraints)
+            self.trajectory = []
+
+        self.words = words
+        self.constraints = constraints
+
+        self.penalty = 0
+        self.bounds = []
+        self.choices = [i for i, w in enumerate(words) if w.proofs]
+
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.exhausted = False
+        self.deadline: Optional[float] = None
+        self.moves = 0
+
+    def configure(self):
+        """
+        Guess the configuration for the annealing. Please note that this is
+        completely speculative... Moreover, the "steps" value calculation is
+        really based on nothing but intuition.
+        """
+
+        t_mins = []
+        t_maxs = []
+        self.bounds = []
+
+        for constraint in self.constraints:
+            t_min, t_max = constraint.energy_bounds(self.words)
+            t_mins.append(t_min)
+            t_maxs.append(t_max)
+
+            self.bounds.append((t_min, t_max))
+
+        self.Tmin = float(sum(t_mins))
+        self.Tmax = sum(t_maxs) * self.MAX_ATTENUATION
+        self.steps = 10000
+
+    def anneal(self):
+        self.moves = 0
+
+        if self.time_budget is not None:
+            self.deadline = monotonic() + self.time_budget
+
+        out = super().anneal()
+
+        if self.profiler is not None:
+            self.profiler.record(self.profile())
+
+        return out
+
+    def profile(self) -> 'RunProfile':
+        return RunProfile(
+            constraints=[c.__class__.__name__ for c in self.constraints],
+            timings=list(self.timings or []),
+            energy_calls=self.energy_calls,
+            accepted=self.accepted,
+            rejected=self.rejected,
+            steps=self.steps,
+            best_step=self.best_step,
+            best_energy=self.best_energy,
+            t_min=self.Tmin,
+            t_max=self.Tmax,
+            exhausted=self.exhausted,
+            trajectory=list(self.trajectory or []),
+            profiler=self.profiler.key if self.profiler is not None else '',
+        )
+
+    def check_budget(self) -> bool:
+        """
+        Counts a move and tells if the budget allows it. When it doesn't,
+        the annealing is asked to stop.
+        """
+
+        self.moves += 1
+
+        if (self.step_budget is not None and self.moves > self.step_budget) \
+                or (self.deadline is not None and monotonic() > self.deadline):
+            self.exhausted = True
+            self.user_exit = True
+
+        return not self.exhausted
+
+    def move(self) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Picks a word which has proofs and gives it another proof (or no proof
+        at all). Returns the word and its previous proof.
+        """
+
+        if not self.check_budget() or not self.choices:
+            return None
+
+        word_idx = self.random.choice(self.choices)
+        current = self.state[word_idx]
+
+        # Options are None then all the proofs, minus the current one
+        options = len(self.words[word_idx].proofs)
+        skip = 0 if current is None else current + 1
+        pick = self.random.randrange(0, options)
+
+        if pick >= skip:
+            pick += 1
+
+        self.state[word_idx] = None if pick == 0 else pick - 1
+
+        return word_idx, current
+
+    def undo(self, change: Tuple[int, Optional[int]]) -> None:
+        word_idx, previous = change
+        self.state[word_idx] = previous
+
+    def proofs(self) -> Iterator[Optional[Proof]]:
+        for word_idx, proof_idx in enumerate(self.state):
+            if proof_idx is None:
+                yield None
+            else:
+                yield self.words[word_idx].proofs[proof_idx]
+
+    def energy(self):
+        """
+        All scores found are added up to the energy. If a constraint is outside
+        of its acceptable bounds, then the Tmin is added to the energy so it
+        won't be authorized to finish.
+        """
+
+        proofs = list(self.proofs())
+        score = .0
+
+        if self.timings is not None:
+            return self.timed_energy(proofs)
+
+        for (min_s, max_s), constraint in zip(self.bounds, self.constraints):
+            s = constraint.energy(proofs)
+            score += s
+
+            if s >= min_s:
+                score += self.Tmin
+
+        return score
+
+    def timed_energy(self, proofs: List[Optional[Proof]]) -> float:
+        """
+        Same as `energy()`, timing each constraint.
+        """
+
+        score = .0
+        self.energy_calls += 1
+
+        for i, ((min_s, max_s), constraint) in enumerate(
+                zip(self.bounds, self.constraints)):
+            start = perf_counter()
+            s = constraint.energy(proofs)
+            self.timings[i] += perf_counter() - start
+            score += s
+
+            if s >= min_s:
+                score += self.Tmin
+
+        return score
+
+
+class ParallelTemperingSolver(IronThroneSolver):
+    """
+    Instead of cooling down one state, several replicas of the state are
+    explored at fixed temperatures spread between `Tmin` and `Tmax`. From
+    time to time, replicas at neighbour temperatures exchange their states
+    (replica exchange), which lets good states found at high temperature get
+    refined at low temperature and helps escaping local minima.
+
+    The number of energy evaluations is the same as for the regular solver,
+    they're just split between the replicas.
+    """
+
+    REPLICAS = 4
+    SWAP_INTERVAL = 10
+
+    def temperatures(self) -> List[float]:
+        """
+        Geometric progression from `Tmin` to `Tmax`.
+        """
+
+        if self.Tmin <= 0.0:
+            raise ValueError('Parallel tempering requires a minimum '
+                             'temperature greater than zero')
+
+        if self.REPLICAS < 2:
+            return [self.Tmin]
+
+        factor = log(self.Tmax / self.Tmin) / (self.REPLICAS - 1)
+        return [self.Tmin * exp(factor * k) for k in range(0, self.REPLICAS)]
+
+    def anneal(self):
+        self.moves = 0
+
+        if self.time_budget is not None:
+            self.deadline = monotonic() + self.time_budget
+
+        temperatures = self.temperatures()
+        states = [list(self.state) for _ in temperatures]
+        energies = [self.energy() for _ in temperatures]
+        self.best_state = list(self.state)
+        self.best_energy = energies[0]
+        interval = max(
+            1,
+            self.steps // self.TRAJECTORY_POINTS // len(temperatures),
+        )
+
+        for step in range(0, self.steps // len(temperatures)):
+            if self.trajectory is not None and step % interval == 0:
+                self.trajectory.append(
+                    (step * len(temperatures), temperatures[0], energies[0])
+                )
+
+            for k, t in enumerate(temperatures):
+                self.state = states[k]
+                change = self.move()
+
+                if self.exhausted:
+                    break
+
+                if change is None:
+                    continue
+
+                e = self.energy()
+                de = e - energies[k]
+
+                if de > 0.0 and exp(-de / t) < self.random.random():
+                    self.undo(change)
+                    self.rejected += 1
+                    continue
+
+                energies[k] = e
+                self.accepted += 1
+
+                if e < self.best_energy:
+                    self.best_state = list(self.state)
+                    self.best_energy = e
+                    self.best_step = step * len(temperatures) + k
+
+            if self.exhausted:
+                break
+
+            if step % self.SWAP_INTERVAL == 0:
+                self.swap(temperatures, states, energies)
+
+        self.state = list(self.best_state)
+
+        if self.profiler is not None:
+            self.profiler.record(self.profile())
+
+        return self.best_state, self.best_energy
+
+    def swap(self,
+             temperatures: List[float],
+             states: List[State],
+             energies: List[float]) -> None:
+        """
+        Tries to exchange the states of each pair of neighbour temperatures,
+        following the Metropolis criterion for replica exchange.
+        """
+
+        for k in range(0, len(temperatures) - 1):
+            delta = (1. / temperatures[k] - 1. / temperatures[k + 1]) \
+                * (energies[k] - energies[k + 1])
+
+            if delta >= 0.0 or self.random.random() < exp(delta):
+                states[k], states[k + 1] = states[k + 1], states[k]
+                energies[k], energies[k + 1] = energies[k + 1], energies[k]
+
+
+def run_solver(solver_class: Type,
+               words: List[Word],
+               constraints: List[Constraint],
+               time_budget: Optional[float],
+               step_budget: Optional[int]) \
+        -> Tuple[State, float, bool, Optional[RunProfile]]:
+    """
+    Runs one solver and returns its best state, energy, whether it ran out
+    of budget and its profile if it has a copy of a profiler (see
+    `Profiler`). This is a plain function so it can be sent to a process
+    pool.
+    """
+
+    solver = solver_class(
+        words,
+        constraints,
+        time_budget=time_budget,
+        step_budget=step_budget,
+    )
+    solver.configure()
+    solver.anneal()
+
+    profiler = getattr(solver, 'profiler', None)
+    profile = None
+
+    if profiler is not None and profiler.remote:
+        profile = solver.profile()
+
+    return list(solver.state), solver.energy(), solver.exhausted, profile
+
+
+class MultiStartSolver(object):
+    """
+    Runs several independent solvers and keeps the best state, to be less
+    sensitive to an unlucky run getting stuck in a local minimum.
+
+    Starts run on the executor if one is given (a process pool will use
+    several cores), otherwise they run one after the other and share the time
+    budget. Use it with `functools.partial()` to choose the parameters:
+
+    >>> IronThrone(pretenders, constraints, solver_class=partial(
+    >>>     MultiStartSolver,
+    >>>     starts=4,
+    >>>     executor=ProcessPoolExecutor(4),
+    >>> ))
+    """
+
+    def __init__(self,
+                 words: List[Word],
+                 constraints: List[Constraint],
+                 time_budget: Optional[float] = None,
+                 step_budget: Optional[int] = None,
+                 starts: int = 4,
+                 executor: Optional[Executor] = None,
+                 solver_class: Type = IronThroneSolver):
+        self.words = words
+        self.constraints = constraints
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.starts = starts
+        self.executor = executor
+        self.solver_class = solver_class
+
+        self.state: State = [None] * len(words)
+        self.best_energy: Optional[float] = None
+        self.exhausted = False
+
+    def configure(self):
+        """
+        Each start configures its own solver.
+        """
+
+    def anneal(self):
+        time_budget = self.time_budget
+        args = (self.solver_class, self.words, self.constraints)
+
+        if self.executor is None:
+            if time_budget is not None:
+                time_budget /= self.starts
+
+            results = [
+                run_solver(*args, time_budget, self.step_budget)
+                for _ in range(0, self.starts)
+            ]
+        else:
+            futures = [
+                self.executor.submit(
+                    run_solver,
+                    *args,
+                    time_budget,
+                    self.step_budget,
+                )
+                for _ in range(0, self.starts)
+            ]
+            results = [f.result() for f in futures]
+
+        state, energy, _, _ = min(results, key=lambda r: r[1])
+
+        self.state = state
+        self.best_energy = energy
+        self.exhausted = any(exhausted for _, _, exhausted, _ in results)
+
+        for _, _, _, profile in results:
+            if profile is not None:
+                Profiler.forward(profile)
+
+        return self.state, self.best_energy
+
+    def proofs(self) -> Iterator[Optional[Proof]]:
+        for word_idx, proof_idx in enumerate(self.state):
+            if proof_idx is None:
+                yield None
+            else:
+                yield self.words[word_idx].proofs[proof_idx]
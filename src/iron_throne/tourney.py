@@ -1,24 +1,30 @@
-from random import (
-    SystemRandom,
+from threading import (
+    Lock,
+)
+from time import (
+    monotonic,
 )
 from typing import (
+    TYPE_CHECKING,
     List,
+    NamedTuple,
     Optional,
     Set,
     Text,
     Tuple,
-)
-
-from simanneal import (
-    Annealer,
+    Type,
 )
 
 from .claim import (
     Claim,
-    Proof,
 )
 from .constraints import (
     Constraint,
+    prune,
+)
+from .memory import (
+    Footprint,
+    add_footprints,
 )
 from .pretenders import (
     Pretender,
@@ -28,113 +34,228 @@ from .words import (
     tokenize,
 )
 
-random = SystemRandom()
+if TYPE_CHECKING:
+    from .solver import RunProfile
 
 
-class IronThroneSolver(Annealer):
-    MAX_ATTENUATION = 0.9
+def __getattr__(name: Text):
+    """
+    The solver used to be defined here, it is now loaded on demand from the
+    `solver` module.
+    """
 
-    def __init__(self, words: List[Word], constraints: List[Constraint]):
-        super().__init__([None] * len(words))
+    if name == 'IronThroneSolver':
+        from .solver import IronThroneSolver
+        return IronThroneSolver
 
-        self.words = words
-        self.constraints = constraints
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-        self.penalty = 0
-        self.bounds = []
 
-    def configure(self):
-        """
-        Guess the configuration for the annealing. Please note that this is
-        completely speculative... Moreover, the "steps" value calculation is
-        really based on nothing but intuition.
-        """
+class Result(NamedTuple):
+    """
+    Outcome of the solving. If `exhausted` is true, the solver ran out of
+    budget and the claims are the best ones found before that.
 
-        t_mins = []
-        t_maxs = []
-        self.bounds = []
+    The `profile` is only set when the solver had a copy of a profiler (in
+    another process), see `Profiler`.
+    """
 
-        for constraint in self.constraints:
-            t_min, t_max = constraint.energy_bounds(self.words)
-            t_mins.append(t_min)
-            t_maxs.append(t_max)
+    claims: List[Claim]
+    score: float
+    exhausted: bool
+    profile: Optional['RunProfile'] = None
 
-            self.bounds.append((t_min, t_max))
 
-        self.Tmin = float(sum(t_mins))
-        self.Tmax = sum(t_maxs) * self.MAX_ATTENUATION
-        self.updates = 0
-        self.steps = 10000
+def solve(words: List[Word],
+          constraints: List[Constraint],
+          solver_class: Optional[Type] = None,
+          time_budget: Optional[float] = None,
+          step_budget: Optional[int] = None) -> Result:
+    """
+    Chooses the claims from words that have been claimed and cleaned up.
+    This is a plain function so it can be sent to a process pool.
+    """
 
-    def move(self):
-        valid_word_idx = [i for i, w in enumerate(self.words) if w.proofs]
+    if solver_class is None:
+        from .solver import IronThroneSolver
+        solver_class = IronThroneSolver
 
-        if not valid_word_idx:
-            return
+    solver = solver_class(
+        words,
+        constraints,
+        time_budget=time_budget,
+        step_budget=step_budget,
+    )
+    solver.configure()
+    solver.anneal()
 
-        word_idx = random.choice(valid_word_idx)
+    proofs = list(solver.proofs())
+    score = min((c.score(proofs) for c in constraints), default=.0)
+    claims: Set[Claim] = set(p.claim for p in proofs if p is not None)
 
-        valid_proof_idx = [
-            x for x
-            in [None] + list(range(0, len(self.words[word_idx].proofs)))
-            if self.state[word_idx] != x
-        ]
+    profiler = getattr(solver, 'profiler', None)
+    profile = None
 
-        if not valid_proof_idx:
-            return
+    if profiler is not None and profiler.remote:
+        profile = solver.profile()
 
-        self.state[word_idx] = random.choice(valid_proof_idx)
+    return Result(list(claims), score, solver.exhausted, profile)
 
-    def proofs(self) -> List[Optional[Proof]]:
-        for word_idx, proof_idx in enumerate(self.state):
-            if proof_idx is None:
-                yield None
-            else:
-                yield self.words[word_idx].proofs[proof_idx]
 
-    def energy(self):
-        """
-        All scores found are added up to the energy. If a constraint is outside
-        of its acceptable bounds, then the Tmin is added to the energy so it
-        won't be authorized to finish.
-        """
+class BudgetStats(object):
+    """
+    Counts how many requests ran out of budget, to help tuning the capacity.
+    """
 
-        proofs = list(self.proofs())
-        score = .0
+    def __init__(self):
+        self.lock = Lock()
+        self.requests = 0
+        self.exhausted = 0
 
-        for (min_s, max_s), constraint in zip(self.bounds, self.constraints):
-            s = constraint.energy(proofs)
-            score += s
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
 
-            if s >= min_s:
-                score += self.Tmin
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
 
-        return score
+    def record(self, exhausted: bool) -> None:
+        with self.lock:
+            self.requests += 1
+
+            if exhausted:
+                self.exhausted += 1
+
+    @property
+    def exhausted_ratio(self) -> float:
+        """
+        Fraction of the requests that ran out of budget.
+        """
+
+        if not self.requests:
+            return .0
+
+        return float(self.exhausted) / float(self.requests)
 
 
 class IronThrone(object):
     def __init__(self,
                  pretenders: List[Pretender],
-                 constraints: List[Constraint]) -> None:
+                 constraints: List[Constraint],
+                 solver_class: Optional[Type] = None,
+                 time_budget: Optional[float] = None,
+                 step_budget: Optional[int] = None,
+                 prune: bool = False) -> None:
+        """
+        The solver class defaults to `IronThroneSolver`. Any class with the
+        same interface (`configure()`, `anneal()`, `proofs()` and
+        `exhausted`) can be used instead.
+
+        The time budget (in seconds) covers a whole request, while the step
+        budget limits the number of moves of the solver. When a request runs
+        out of budget, the best solution found so far is returned.
+
+        If `prune` is true, the claims that constraints declare infeasible
+        are removed before solving (see `prune()`). This makes the search
+        space smaller but it can change the results, so it's disabled by
+        default.
+        """
+
         super().__init__()
         self.pretenders = pretenders
         self.constraints = constraints
+        self.solver_class = solver_class
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.prune = prune
+        self.stats = BudgetStats()
 
-    def get_entities(self, text: Text) -> Tuple[List[Claim], float]:
-        words = list(tokenize(text))
+    def tokenize(self, text: Text) -> List[Word]:
+        return list(tokenize(text))
+
+    def footprint(self) -> Footprint:
+        """
+        Memory used by the indexes of the pretenders, objects shared between
+        pretenders being counted once. Pretenders without a `footprint()`
+        method (like `ShardedPretender`, whose shards may live in other
+        processes) are not counted.
+        """
+
+        seen: Set[int] = set()
+
+        return add_footprints(
+            pretender.footprint(seen=seen)
+            for pretender in self.pretenders
+            if hasattr(pretender, 'footprint')
+        )
+
+    def claim(self, words: List[Word]) -> List[Word]:
+        """
+        Lets all the pretenders claim the words.
+        """
 
         for pretender in self.pretenders:
             pretender.claim(words)
 
+        return words
+
+    def cleanup(self, words: List[Word]) -> List[Word]:
+        """
+        Lets the constraints remove the proofs that can't be part of a
+        solution, then prunes the claims they declare infeasible if enabled.
+        """
+
         for constraint in self.constraints:
             constraint.cleanup(words)
 
-        solver = IronThroneSolver(words, self.constraints)
-        solver.configure()
-        solver.anneal()
+        if self.prune:
+            prune(words, self.constraints)
+
+        return words
+
+    def solve(self,
+              words: List[Word],
+              time_budget: Optional[float] = None) -> Result:
+        """
+        Solves and records the outcome in the stats. The time budget defaults
+        to the one of the instance.
+        """
+
+        if time_budget is None:
+            time_budget = self.time_budget
+
+        return self.record(solve(
+            words,
+            self.constraints,
+            self.solver_class,
+            time_budget,
+            self.step_budget,
+        ))
+
+    def record(self, result: Result) -> Result:
+        self.stats.record(result.exhausted)
+
+        if result.profile is not None:
+            from .solver import Profiler
+            Profiler.forward(result.profile)
 
-        proofs = list(solver.proofs())
-        score = min((c.score(proofs) for c in self.constraints), default=.0)
-        claims: Set[Claim] = set(p.claim for p in proofs if p is not None)
+        return result
 
-        return list(claims), score
+    def get_result(self, text: Text) -> Result:
+        start = monotonic()
+        words = self.tokenize(text)
+        self.claim(words)
+        self.cleanup(words)
+
+        time_budget = None
+
+        if self.time_budget is not None:
+            time_budget = self.time_budget - (monotonic() - start)
+
+        return self.solve(words, time_budget)
+
+    def get_entities(self, text: Text) -> Tuple[List[Claim], float]:
+        result = self.get_result(text)
+        return result.claims, result.score
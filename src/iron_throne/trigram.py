@@ -6,12 +6,21 @@ or identical results.
 """
 import re
 from collections import (
+    defaultdict,
     deque,
 )
+from functools import (
+    lru_cache,
+)
+from heapq import (
+    nsmallest,
+)
 from typing import (
+    Dict,
     Iterable,
     List,
     Optional,
+    Set,
     Text,
     Tuple,
     TypeVar,
@@ -22,10 +31,63 @@ from unidecode import (
     unidecode,
 )
 
+from .kernel import (
+    CodeArray,
+    jaccard,
+    make_codes,
+)
+
 RE_WHITESPACES = re.compile(r'[\W.,;?!\'"«»\-_\s]+')
 
 T = TypeVar('T')
 
+# unidecode pages (blocks of 256 code points) used by each script
+TRANSLITERATION_PAGES: Dict[Text, List[int]] = {
+    'latin': [0x00, 0x01, 0x02, 0x1e],
+    'greek': [0x03, 0x1f],
+    'cyrillic': [0x04, 0x05],
+    'hebrew': [0x05],
+    'arabic': [0x06, 0x07, 0xfb, 0xfe],
+    'punctuation': [0x20, 0x21, 0x30],
+}
+
+
+def preload_transliterations(scripts: Iterable[Text]) -> None:
+    """
+    unidecode loads its transliteration tables lazily, one page at a time,
+    when it meets a character of that page for the first time. Call this at
+    startup (before forking workers, ideally) with the scripts you expect, so
+    that the first requests don't pay for it.
+    """
+
+    for script in scripts:
+        for page in TRANSLITERATION_PAGES[script]:
+            unidecode(chr((page << 8) | 0xff))
+
+
+@lru_cache(maxsize=None)
+def latin_1_table() -> Dict[int, Text]:
+    """
+    Transliterations of the Latin-1 characters (accented letters of most
+    western languages), to be used with `str.translate()`. They are taken
+    from unidecode, which works character by character, so translating
+    first gives the same result as calling unidecode directly.
+    """
+
+    return {c: unidecode(chr(c)) for c in range(0x80, 0x100)}
+
+
+def is_normalized(string: Text) -> bool:
+    """
+    Tells if an ASCII lowercase string is already normalized: words made of
+    letters and digits separated by single spaces.
+    """
+
+    return string.replace(' ', '').isalnum() \
+        and string[0] != ' ' \
+        and string[-1] != ' ' \
+        and '  ' not in string
+
 
 def normalize(string: Text) -> Text:
     """
@@ -35,10 +97,22 @@ def normalize(string: Text) -> Text:
     - Drop accents
     - Transform all whitespaces sequences into a single space
     - Remove spaces before and after punctuation
+
+    ASCII strings skip the transliteration (and already normalized ones skip
+    everything but the lowercase), while Latin-1 strings are translated with
+    a table. Only other strings go through unidecode.
     """
 
     string = string.lower()
-    string = unidecode(string)
+
+    if string.isascii():
+        if string.isalnum() or is_normalized(string):
+            return string
+    elif max(string) <= '\xff':
+        string = string.translate(latin_1_table())
+    else:
+        string = unidecode(string)
+
     string = RE_WHITESPACES.sub(' ', string).strip()
 
     return string
@@ -55,6 +129,8 @@ def make_trigrams(i: Iterable[T]) \
     to do something like:
 
     >>> t = set(make_trigrams('hi there'))
+
+    For strings, `word_trigrams()` and `word_codes()` are much faster.
     """
     q = deque([None, None, None])
 
@@ -71,6 +147,113 @@ def make_trigrams(i: Iterable[T]) \
         yield nxt()
 
 
+def encode_trigram(trigram: Tuple[Text, Text, Text]) -> int:
+    """
+    Packs the 3 characters of a trigram into an integer (21 bits per
+    character, which is enough for any code point).
+    """
+
+    a, b, c = trigram
+    return (ord(a) << 42) | (ord(b) << 21) | ord(c)
+
+
+def word_trigrams(word: Text) -> Set[Tuple[Text, Text, Text]]:
+    """
+    Same as `set(make_trigrams(word))`, but the trigrams are taken from
+    slices of the word padded with spaces (two before, one after).
+    """
+
+    if not word:
+        return set()
+
+    padded = f'  {word} '
+    return set(zip(padded, padded[1:], padded[2:]))
+
+
+def word_codes(word: Text) -> Set[int]:
+    """
+    Encoded trigrams of a word (see `encode_trigram()`), computed from the
+    code points of the padded word without creating the trigrams.
+    """
+
+    if not word:
+        return set()
+
+    o = [32, 32, *map(ord, word), 32]
+
+    return {
+        (a << 42) | (b << 21) | c
+        for a, b, c in zip(o, o[1:], o[2:])
+    }
+
+
+def extract_trigrams(normalized: Text) -> Set[Tuple[Text, Text, Text]]:
+    """
+    Trigrams of all the words of a normalized string.
+    """
+
+    out: Set[Tuple[Text, Text, Text]] = set()
+
+    for word in make_words(normalized):
+        out.update(word_trigrams(word))
+
+    return out
+
+
+def extract_codes(normalized: Text) -> Set[int]:
+    """
+    Encoded trigrams of all the words of a normalized string.
+    """
+
+    out: Set[int] = set()
+
+    for word in make_words(normalized):
+        out.update(word_codes(word))
+
+    return out
+
+
+def bulk_trigrams(strings: Iterable[Text]) \
+        -> List[Set[Tuple[Text, Text, Text]]]:
+    """
+    Trigrams of each of the strings. Token lists have a lot of duplicates,
+    which are only computed once (and share the same set, which must not be
+    modified).
+    """
+
+    done: Dict[Text, Set[Tuple[Text, Text, Text]]] = {}
+    out = []
+
+    for string in strings:
+        norm = normalize(string)
+
+        if norm not in done:
+            done[norm] = extract_trigrams(norm)
+
+        out.append(done[norm])
+
+    return out
+
+
+def bulk_codes(strings: Iterable[Text]) -> List[Set[int]]:
+    """
+    Same as `bulk_trigrams()`, for encoded trigrams.
+    """
+
+    done: Dict[Text, Set[int]] = {}
+    out = []
+
+    for string in strings:
+        norm = normalize(string)
+
+        if norm not in done:
+            done[norm] = extract_codes(norm)
+
+        out.append(done[norm])
+
+    return out
+
+
 class Trigram(object):
     """
     This represents a "compiled" trigram object. It is able to compute its
@@ -81,23 +264,29 @@ class Trigram(object):
         self._string = string
         self._norm = normalize(string)
         self._words = make_words(self._norm)
-        self._trigrams = set(t for w in self._words for t in make_trigrams(w))
+        self._trigrams = extract_trigrams(self._norm)
+        self._codes: Optional[CodeArray] = None
 
     def __repr__(self):
         return f'Trigram({repr(self._norm)})'
 
-    def similarity(self, other: 'Trigram') -> float:
+    @property
+    def codes(self) -> CodeArray:
         """
-        Compute the similarity with the provided other trigram.
+        Encoded trigrams, in the format expected by the similarity kernel. It
+        is computed on first access.
         """
-        if not len(self._trigrams) or not len(other._trigrams):
-            return 0
 
-        count = float(len(self._trigrams & other._trigrams))
-        len1 = float(len(self._trigrams))
-        len2 = float(len(other._trigrams))
+        if self._codes is None:
+            self._codes = make_codes(extract_codes(self._norm))
+
+        return self._codes
 
-        return count / (len1 + len2 - count)
+    def similarity(self, other: 'Trigram') -> float:
+        """
+        Compute the similarity with the provided other trigram.
+        """
+        return jaccard(self.codes, other.codes)
 
     def __mod__(self, other: 'Trigram') -> float:
         """
@@ -106,6 +295,61 @@ class Trigram(object):
         return self.similarity(other)
 
 
+class InvertedIndex(object):
+    """
+    Inverted index of a list of trigrams: for each trigram code, the list of
+    trigrams (by position) which contain it. This allows to only score the
+    trigrams that have at least one code in common with the query, since all
+    the other ones have a similarity of 0.
+    """
+
+    def __init__(self, trigrams: List[Trigram]):
+        self.lengths: List[int] = []
+        self.postings: Dict[int, List[int]] = defaultdict(lambda: [])
+
+        for i, t in enumerate(trigrams):
+            self.lengths.append(len(t.codes))
+
+            for code in t.codes:
+                self.postings[code].append(i)
+
+    def scores(self, other: Trigram) -> Dict[int, float]:
+        """
+        Similarity of the query with all the indexed trigrams that have a
+        non-zero similarity with it.
+        """
+
+        counts: Dict[int, int] = defaultdict(lambda: 0)
+
+        for code in other.codes:
+            for i in self.postings.get(code, []):
+                counts[i] += 1
+
+        len2 = float(len(other.codes))
+
+        return {
+            i: float(count) / (float(self.lengths[i]) + len2 - float(count))
+            for i, count in counts.items()
+        }
+
+
+def top_scores(scores: Dict[int, float], k: int, threshold: float) \
+        -> List[Tuple[float, int]]:
+    """
+    Returns the `k` best (score, position) pairs above the threshold, the
+    best first. Equal scores are sorted by position.
+    """
+
+    return [
+        (score, i)
+        for i, score in nsmallest(
+            k,
+            ((i, s) for i, s in scores.items() if s >= threshold),
+            key=lambda x: (-x[1], x[0]),
+        )
+    ]
+
+
 class Matcher(object):
     """
     Allows to match several trigrams at once. This is useful to detect intents.
@@ -117,6 +361,15 @@ class Matcher(object):
             for t in trigrams
         ]
 
+        self._groups: List[Tuple[int, int]] = []
+        flat: List[Trigram] = []
+
+        for local in self.trigrams:
+            self._groups.append((len(flat), len(flat) + len(local)))
+            flat.extend(local)
+
+        self._index = InvertedIndex(flat)
+
     def _match(self, local: Tuple[Trigram, ...], other: Trigram) -> float:
         """
         Match a trigram with another one. If the negative matching wins,
@@ -131,11 +384,43 @@ class Matcher(object):
 
         return pos
 
+    def _scores(self, other: Trigram) -> Dict[int, float]:
+        """
+        Same as `_match()` for all the groups of trigrams, using the index.
+        Groups with a null score are omitted.
+        """
+
+        scores = self._index.scores(other)
+        out: Dict[int, float] = {}
+
+        for n, (start, end) in enumerate(self._groups):
+            pos = scores.get(start)
+
+            if pos is None:
+                continue
+
+            neg = max((scores.get(i, 0) for i in range(start + 1, end)),
+                      default=0)
+
+            if neg <= pos:
+                out[n] = pos
+
+        return out
+
     def similarity(self, other: Trigram) -> float:
         """
         Find the best similarity within known trigrams.
         """
-        return max((self._match(x, other) for x in self.trigrams), default=0)
+        return max(self._scores(other).values(), default=0)
+
+    def top(self, other: Trigram, k: int = 10, threshold: float = .0) \
+            -> List[Tuple[float, int]]:
+        """
+        Returns the `k` best matches with a score of at least `threshold`, as
+        (score, position of the trigrams in the matcher) pairs.
+        """
+
+        return top_scores(self._scores(other), k, threshold)
 
     def __mod__(self, other) -> float:
         """
@@ -155,13 +440,31 @@ class LabelMatcher(object):
 
     def __init__(self, trigrams: List[Tuple[Trigram, L]]):
         self.trigrams = trigrams
+        self._index = InvertedIndex([t for t, _ in trigrams])
 
     def similarity(self, other: Trigram) -> Tuple[float, L]:
         """
         Returns the best matching score and the associated label.
         """
 
-        return max(
-            ((t % other, l) for t, l in self.trigrams),
-            key=lambda x: x[0],
-        )
+        if not self.trigrams:
+            raise ValueError('No label to match')
+
+        best = self.top(other, k=1)
+
+        if not best:
+            return 0., self.trigrams[0][1]
+
+        return best[0]
+
+    def top(self, other: Trigram, k: int = 10, threshold: float = .0) \
+            -> List[Tuple[float, L]]:
+        """
+        Returns the `k` best matching scores with their labels, only keeping
+        those with a score of at least `threshold`.
+        """
+
+        return [
+            (score, self.trigrams[i][1])
+            for score, i in top_scores(self._index.scores(other), k, threshold)
+        ]
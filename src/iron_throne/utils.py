@@ -1,5 +1,7 @@
 from typing import (
     List,
+    Set,
+    Text,
 )
 
 
@@ -19,3 +21,47 @@ def is_contiguous(values: List[int]):
         last = value
 
     return True
+
+
+def deletions(string: Text, distance: int) -> Set[Text]:
+    """
+    Generates all the strings that can be obtained by deleting up to
+    `distance` characters from the string (including the string itself).
+    """
+
+    out = {string}
+    edge = {string}
+
+    for _ in range(0, distance):
+        edge = {s[:i] + s[i + 1:] for s in edge for i in range(0, len(s))}
+        out.update(edge)
+
+    return out
+
+
+def edit_distance(a: Text, b: Text) -> int:
+    """
+    Damerau-Levenshtein distance (optimal string alignment variant) between
+    two strings: insertions, deletions, substitutions and transpositions of
+    adjacent characters all cost 1.
+    """
+
+    before: List[int] = []
+    previous = list(range(0, len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+
+        for j, cb in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (0 if ca == cb else 1),
+            )
+
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], before[j - 2] + 1)
+
+        before, previous = previous, current
+
+    return previous[-1]
@@ -1,10 +1,17 @@
 import re
+from sys import (
+    intern,
+)
 from typing import (
     TYPE_CHECKING,
     Iterator,
     List,
+    Optional,
     Text,
 )
+from weakref import (
+    WeakValueDictionary,
+)
 
 from iron_throne.trigram import (
     Trigram,
@@ -17,15 +24,22 @@ from .trigram import (
 if TYPE_CHECKING:
     from .claim import Proof
 
+# Trigrams of the interned words, by normalized text. Entries go away with
+# the last word using them.
+_trigrams: 'WeakValueDictionary[Text, Trigram]' = WeakValueDictionary()
+
 
-def tokenize(text: Text) -> Iterator['Word']:
+def tokenize(text: Text, interned: bool = False) -> Iterator['Word']:
     """
     Transform a string into a bunch of words. Those words can get an expression
     attached if required.
+
+    If `interned` is true, words with the same normalized text share their
+    normalized string and trigrams (see `Word`).
     """
 
     for order, word in enumerate(re.split(r'\W+', text)):
-        yield Word(word, order)
+        yield Word(word, order, interned)
 
 
 class Word(object):
@@ -36,13 +50,54 @@ class Word(object):
 
     def __init__(self,
                  text: Text,
-                 order: int=0):
+                 order: int=0,
+                 interned: bool=False):
+        """
+        Expressions of a big catalog share a lot of words ("saint", "sur",
+        "la", ...). Interned words with the same normalized text share the
+        same normalized string and `Trigram` object instead of each having
+        their own copy. The trigrams must then be treated as read-only.
+        """
+
         self.text = text
         self.order = order
+        self.interned = interned
         self.proofs: List['Proof'] = []
 
         self._norm = normalize(text)
-        self._trigram = Trigram(text)
+        trigram: Optional[Trigram] = None
+
+        if interned:
+            self._norm = intern(self._norm)
+            trigram = _trigrams.get(self._norm)
+
+        if trigram is None:
+            # Shared trigrams are made from the normalized string, so that
+            # they don't keep the text of the first word alive
+            trigram = Trigram(self._norm if interned else text)
+
+            if interned:
+                _trigrams[self._norm] = trigram
+
+        self._trigram = trigram
+
+    def __setstate__(self, state):
+        """
+        Interned words are interned again when unpickled (from a compiled
+        model, for example), so that they keep sharing their trigrams with
+        the words created afterwards.
+        """
+
+        self.__dict__.update(state)
+
+        if self.interned:
+            self._norm = intern(self._norm)
+            trigram = _trigrams.get(self._norm)
+
+            if trigram is None:
+                _trigrams[self._norm] = self._trigram
+            else:
+                self._trigram = trigram
 
     def __hash__(self):
         return hash(self.text)
@@ -29,7 +29,8 @@ expressions = [
 
 def test_ep_index():
     ep = ExpressionPretender(expressions)
-    assert ep.index[(' ', ' ', 'c')] == [
+    assert ep.index[(' ', ' ', 'c')] == ['cheese']
+    assert ep.vocabulary['cheese'] == [
         ExpressionMatch(
             expression=expressions[2],
             word=Word('cheese'),
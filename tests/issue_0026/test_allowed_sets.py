@@ -0,0 +1,75 @@
+from itertools import (
+    combinations,
+)
+
+from iron_throne.claim import (
+    Claim,
+    Proof,
+)
+from iron_throne.constraints import (
+    AllowedSets,
+    EntitySet,
+)
+from iron_throne.words import (
+    Word,
+)
+
+SETS = [
+    EntitySet(50, {'activity', 'interest'}, {'city', 'age'}),
+    EntitySet(0, {'sanitary'}, set()),
+    EntitySet(50, {'city'}, {'food'}),
+]
+
+ENTITIES = ['activity', 'interest', 'city', 'age', 'sanitary', 'food', 'x']
+
+
+def make_proofs(entities):
+    return [
+        Proof(0, Claim(e, e, 1., 1, i), Word(e), 1.)
+        for i, e in enumerate(entities)
+    ] + [None]
+
+
+def reference_energy(allowed_sets, proofs):
+    allowed = set()
+    penalty = 0
+    present = allowed_sets.extract_entities(proofs)
+    current_set = allowed_sets.choose_set(present)
+
+    if current_set:
+        allowed = current_set.needs_one_of | current_set.also_allowed
+        penalty = current_set.penalty
+
+    return len(present - allowed) * allowed_sets.EXTRA_ENTITY_WEIGHT + penalty
+
+
+def test_compiled_matches_sets():
+    a = AllowedSets(SETS)
+
+    for n in range(0, 4):
+        for entities in combinations(ENTITIES, n):
+            proofs = make_proofs(entities)
+            energy = reference_energy(a, proofs)
+
+            assert a.energy(proofs) == energy
+            assert a.score(proofs) == (1. if energy < 100 else .0)
+
+
+def test_choices_cached():
+    a = AllowedSets(SETS)
+    proofs = make_proofs(['sanitary', 'x'])
+
+    assert a.energy(proofs) == 100.
+    assert a.extract_mask(proofs) == (a.entity_bit('sanitary'), 1)
+    assert a.choices[a.entity_bit('sanitary')] == (0, 0)
+
+
+def test_unknown_entities_not_recorded():
+    a = AllowedSets(SETS)
+    ids = dict(a.entity_ids)
+    proofs = make_proofs(['city', 'x', 'y', 'x'])
+
+    assert a.energy(proofs) == 50. + 200.
+    assert a.score(proofs) == 0.
+    assert a.entity_ids == ids
+    assert a.entity_bit('y') == 0
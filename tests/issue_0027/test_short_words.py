@@ -0,0 +1,69 @@
+from iron_throne.pretenders import (
+    Expression,
+    ShortWordPretender,
+)
+from iron_throne.utils import (
+    deletions,
+    edit_distance,
+)
+from iron_throne.words import (
+    Word,
+)
+
+expressions = [
+    Expression('ham', 'food', 'ham'),
+    Expression('gin tonic', 'drink', 'gin-tonic'),
+    Expression('elephant', 'animal', 'elephant'),
+    Expression('le mans', 'city', 'le-mans'),
+    Expression('ok', 'answer', 'ok'),
+]
+
+
+def test_deletions():
+    assert deletions('ham', 1) == {'ham', 'am', 'hm', 'ha'}
+    assert deletions('ab', 2) == {'ab', 'a', 'b', ''}
+
+
+def test_edit_distance():
+    assert edit_distance('ham', 'ham') == 0
+    assert edit_distance('ham', 'hma') == 1
+    assert edit_distance('ham', 'hamm') == 1
+    assert edit_distance('ham', 'jam') == 1
+    assert edit_distance('', 'abc') == 3
+    assert edit_distance('kitten', 'sitting') == 3
+
+
+def test_short_typo():
+    words = [Word('hma'), Word('gni'), Word('tonic'), Word('elephants')]
+    ShortWordPretender(expressions).claim(words)
+
+    ham, gin, tonic, elephant = words
+
+    assert [p.claim.value for p in ham.proofs] == ['ham']
+    assert ham.proofs[0].score == 1. - 1. / 3.
+    assert [(p.claim.value, p.order) for p in gin.proofs] == \
+        [('gin-tonic', 0)]
+    assert [(p.claim.value, p.order) for p in tonic.proofs] == \
+        [('gin-tonic', 1)]
+    assert [p.claim.value for p in elephant.proofs] == ['elephant']
+
+
+def test_short_no_junk():
+    words = [Word('hi'), Word('the')]
+    ShortWordPretender(expressions).claim(words)
+
+    assert words[0].proofs == []
+    assert words[1].proofs == []
+
+
+def test_two_letters():
+    words = [Word('la'), Word('mans'), Word('ko'), Word('o')]
+    ShortWordPretender(expressions).claim(words)
+
+    la, mans, ko, o = words
+
+    assert [(p.claim.value, p.score) for p in la.proofs] == \
+        [('le-mans', .5)]
+    assert [p.claim.value for p in mans.proofs] == ['le-mans']
+    assert [(p.claim.value, p.score) for p in ko.proofs] == [('ok', .5)]
+    assert o.proofs == []
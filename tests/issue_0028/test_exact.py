@@ -0,0 +1,30 @@
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.words import (
+    Word,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('salads', 'food', 'salads'),
+    Expression('Pâté', 'food', 'pate'),
+]
+
+
+def test_exact_first():
+    ep = ExpressionPretender(expressions)
+
+    assert [(m.expression.value, s) for m, s in ep.candidates(Word('SALAD'))] \
+        == [('salad', 1.)]
+    assert [(m.expression.value, s) for m, s in ep.candidates(Word('pate'))] \
+        == [('pate', 1.)]
+
+
+def test_fuzzy_fallback():
+    ep = ExpressionPretender(expressions)
+    values = {m.expression.value for m, _ in ep.candidates(Word('salade'))}
+
+    assert values == {'salad'}
+    assert list(ep.candidates(Word(''))) == []
@@ -0,0 +1,68 @@
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pretenders import (
+    Expression,
+    SequencePretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('la rochelle', 'city', 'la-rochelle'),
+    Expression('rochelle sur mer', 'city', 'rochelle-sur-mer'),
+    Expression('saint malo', 'city', 'saint-malo'),
+]
+
+
+def test_find_sequences():
+    sp = SequencePretender(expressions)
+    words = list(tokenize('la rochelle sur mer potato salad'))
+
+    assert sorted(
+        (end, e.value) for end, _, e in sp.find_sequences(words)
+    ) == [
+        (1, 'la-rochelle'),
+        (3, 'rochelle-sur-mer'),
+        (5, 'potato-salad'),
+        (5, 'salad'),
+    ]
+
+
+def test_claim_sequences():
+    words = list(tokenize('I like Potato Salad in Saintt Malo'))
+    SequencePretender(expressions).claim(words)
+
+    assert [(p.claim.value, p.order, p.score) for p in words[2].proofs] == \
+        [('potato-salad', 0, 1.)]
+    assert sorted((p.claim.value, p.order) for p in words[3].proofs) == \
+        [('potato-salad', 1), ('salad', 0)]
+    assert [(p.claim.value, p.order) for p in words[5].proofs] == \
+        [('saint-malo', 0)]
+    assert [(p.claim.value, p.order) for p in words[6].proofs] == \
+        [('saint-malo', 1)]
+    assert words[5].proofs[0].score < 1.
+    assert words[6].proofs[0].score == 1.
+
+
+def test_get_entities():
+    i = IronThrone([
+        SequencePretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ])
+
+    entities, score = i.get_entities('I like potato salad')
+
+    assert [c.value for c in entities] == ['potato-salad']
+    assert score == 1.
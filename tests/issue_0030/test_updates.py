@@ -0,0 +1,89 @@
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+    ShortWordPretender,
+)
+from iron_throne.words import (
+    Word,
+    tokenize,
+)
+
+salad = Expression('salad', 'food', 'salad')
+potato_salad = Expression('potato salad', 'food', 'potato-salad')
+ham = Expression('ham', 'food', 'ham')
+
+
+def values(pretender, text, snapshot=None):
+    return sorted(
+        m.expression.value
+        for m, _ in pretender.candidates(Word(text), snapshot)
+    )
+
+
+def test_add_remove():
+    ep = ExpressionPretender([salad], seq=10)
+
+    assert values(ep, 'salad') == ['salad']
+    assert values(ep, 'potato') == []
+
+    ep.add_expressions([potato_salad, ham])
+
+    assert values(ep, 'salad') == ['potato-salad', 'salad']
+    assert values(ep, 'potatos') == ['potato-salad']
+    assert [e.value for e in ep.expressions] == \
+        ['salad', 'potato-salad', 'ham']
+
+    ep.remove_expressions([salad])
+
+    assert values(ep, 'salad') == ['potato-salad']
+    assert [m.seq for m, _ in ep.candidates(Word('ham'))] == [12]
+
+    ep.remove_expressions([potato_salad, ham])
+
+    assert ep.index == {}
+    assert ep.vocabulary == {}
+
+
+def test_same_as_rebuild():
+    expressions = [salad, potato_salad, ham]
+    ep = ExpressionPretender([])
+    ep.add_expressions(expressions)
+    ep.add_expressions([Expression('cheese', 'food', 'cheese')])
+    ep.remove_expressions([Expression('cheese', 'food', 'cheese')])
+
+    assert ep.index == ExpressionPretender(expressions).index
+
+
+def test_snapshot_isolation():
+    ep = ExpressionPretender([salad])
+    snapshot = ep.snapshot
+
+    ep.add_expressions([potato_salad])
+    ep.remove_expressions([salad])
+
+    assert values(ep, 'salad', snapshot) == ['salad']
+    assert values(ep, 'salad') == ['potato-salad']
+
+
+def test_short_words_update():
+    sp = ShortWordPretender([ham])
+
+    assert values(sp, 'hma') == ['ham']
+
+    sp.remove_expressions([ham])
+
+    assert values(sp, 'hma') == []
+    assert sp.snapshot.deletions == {}
+
+
+def test_sequences_update():
+    sp = SequencePretender([salad])
+    words = list(tokenize('potato salad'))
+
+    assert [e.value for _, _, e in sp.find_sequences(words)] == ['salad']
+
+    sp.add_expressions([potato_salad])
+
+    assert sorted(e.value for _, _, e in sp.find_sequences(words)) == \
+        ['potato-salad', 'salad']
@@ -0,0 +1,78 @@
+from iron_throne.constraints import (
+    FullMatches,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.shards import (
+    ShardedPretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('cheese', 'food', 'cheese'),
+    Expression('ham', 'food', 'ham'),
+
+    Expression('turtle', 'animal', 'turtle'),
+    Expression('fox', 'animal', 'fox'),
+    Expression('elephant', 'animal', 'elephant'),
+]
+
+PHRASE = 'the elephant eats potatos salad and chese'
+
+
+def proofs(pretender):
+    words = list(tokenize(PHRASE))
+    pretender.claim(words)
+
+    return [
+        sorted(
+            (p.claim.value, p.claim.seq, p.claim.score, p.order, p.score)
+            for p in word.proofs
+        )
+        for word in words
+    ]
+
+
+def test_same_as_single():
+    expected = proofs(ExpressionPretender(expressions, seq=3))
+
+    for key in [None, lambda e: e.entity]:
+        sp = ShardedPretender(
+            expressions,
+            shards=3,
+            seq=3,
+            key=key,
+            processes=False,
+        )
+        assert proofs(sp) == expected
+
+
+def test_processes():
+    expected = proofs(ExpressionPretender(expressions))
+    sp = ShardedPretender(expressions, shards=2)
+
+    try:
+        assert proofs(sp) == expected
+        assert proofs(sp) == expected
+    finally:
+        sp.close()
+
+
+def test_options_same_as_single():
+    options = dict(
+        max_candidates=1,
+        max_proofs=4,
+        constraints=[FullMatches()],
+    )
+    single = ExpressionPretender(expressions, **options)
+    sp = ShardedPretender(expressions, shards=3, processes=False, **options)
+
+    assert proofs(sp) == proofs(single)
+    assert sp.stats.found == single.stats.found
+    assert sp.stats.kept == single.stats.kept < single.stats.found
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import pytest
+
+from iron_throne.trigram import (
+    normalize,
+    preload_transliterations,
+)
+
+
+def test_solver_not_imported():
+    out = subprocess.check_output([
+        sys.executable,
+        '-c',
+        'import sys, iron_throne; print("iron_throne.solver" in sys.modules)',
+    ])
+
+    assert out.strip() == b'False'
+
+
+def test_solver_compat():
+    from iron_throne.tourney import IronThroneSolver
+    from iron_throne.solver import IronThroneSolver as Solver
+
+    assert IronThroneSolver is Solver
+
+
+def test_preload():
+    preload_transliterations(['latin', 'cyrillic'])
+
+    assert normalize('Crème Брюле') == 'creme briule'
+
+    with pytest.raises(KeyError):
+        preload_transliterations(['klingon'])
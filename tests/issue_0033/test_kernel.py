@@ -0,0 +1,86 @@
+from array import (
+    array,
+)
+from random import (
+    Random,
+)
+
+import pytest
+
+from iron_throne import (
+    kernel,
+)
+from iron_throne.trigram import (
+    LabelMatcher,
+    Matcher,
+    Trigram,
+)
+
+random = Random(42)
+
+TEXTS = ['', 'a', 'hello', 'hallo', 'héllo world', 'yes', 'no', 'yeah'] + [
+    ''.join(random.choice('abcde ') for _ in range(random.randint(1, 12)))
+    for _ in range(50)
+]
+
+
+def reference(a: Trigram, b: Trigram) -> float:
+    # noinspection PyProtectedMember
+    t1, t2 = a._trigrams, b._trigrams
+
+    if not t1 or not t2:
+        return 0
+
+    count = float(len(t1 & t2))
+    return count / (float(len(t1)) + float(len(t2)) - count)
+
+
+KERNELS = [(kernel.py_jaccard, kernel.py_similarities)]
+
+if kernel.NATIVE:
+    KERNELS.append((kernel.jaccard, kernel.similarities))
+
+
+@pytest.mark.parametrize('jaccard, similarities', KERNELS)
+def test_identical(jaccard, similarities):
+    trigrams = [Trigram(t) for t in TEXTS]
+    codes = [t.codes for t in trigrams]
+
+    for a in trigrams:
+        expected = [reference(a, b) for b in trigrams]
+
+        assert [jaccard(a.codes, b.codes) for b in trigrams] == expected
+        assert similarities(a.codes, codes) == expected
+        assert [a % b for b in trigrams] == expected
+
+
+def test_matchers():
+    yes = (Trigram('yes'), Trigram('no'))
+    yeah = Trigram('yeah')
+    m = Matcher([yes, yeah])
+    lm = LabelMatcher([(Trigram(t), t) for t in TEXTS])
+
+    for text in TEXTS:
+        t = Trigram(text)
+        pos = reference(yes[0], t)
+        neg = reference(yes[1], t)
+
+        assert m % t == max(0. if neg > pos else pos, reference(yeah, t))
+        assert lm.similarity(t) == max(
+            ((reference(Trigram(l), t), l) for l in TEXTS),
+            key=lambda x: x[0],
+        )
+
+    assert Matcher([]) % Trigram('yes') == 0
+
+
+@pytest.mark.skipif(not kernel.NATIVE, reason='extension not built')
+def test_native_rejects_other_formats():
+    codes = array('Q', [1, 2])
+
+    for other in [array('d', [1., 2.]), array('q', [1, 2]), b'12345678']:
+        with pytest.raises(TypeError):
+            kernel.jaccard(other, codes)
+
+        with pytest.raises(TypeError):
+            kernel.similarities(codes, [codes, other])
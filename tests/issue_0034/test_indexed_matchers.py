@@ -0,0 +1,35 @@
+from iron_throne.trigram import (
+    LabelMatcher,
+    Matcher,
+    Trigram,
+)
+
+LABELS = ['hello', 'hello there', 'goodbye', 'bye', 'yes', 'no']
+
+
+def test_label_top():
+    lm = LabelMatcher([(Trigram(l), l) for l in LABELS])
+    query = Trigram('hello')
+
+    top = lm.top(query, k=3)
+
+    assert [l for _, l in top] == ['hello', 'hello there']
+    assert top[0] == (1., 'hello')
+    assert top == sorted(top, key=lambda x: -x[0])
+    assert lm.top(query, threshold=.9) == [(1., 'hello')]
+    assert lm.top(Trigram('bye'), k=1) == [(1., 'bye')]
+    assert lm.top(Trigram('xyz')) == []
+    assert lm.similarity(Trigram('xyz')) == (0., 'hello')
+
+
+def test_matcher_top():
+    m = Matcher([
+        (Trigram('yes'), Trigram('yes no')),
+        Trigram('yeah'),
+        Trigram('ok'),
+    ])
+
+    assert [i for _, i in m.top(Trigram('yes'))] == [0, 1]
+    assert [i for _, i in m.top(Trigram('yes no'))] == [1]
+    assert m.top(Trigram('ok'), threshold=.5) == [(1., 2)]
+    assert m % Trigram('xyz') == 0
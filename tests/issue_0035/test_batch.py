@@ -0,0 +1,59 @@
+from random import (
+    Random,
+)
+
+import pytest
+
+from iron_throne.batch import (
+    np_similarity_matrix,
+    py_similarity_matrix,
+    similarity_matrix,
+)
+from iron_throne.trigram import (
+    LabelMatcher,
+    Matcher,
+    Trigram,
+)
+
+random = Random(42)
+
+
+def make_text():
+    length = random.randint(0, 8)
+    return ''.join(random.choice('abcde ') for _ in range(length))
+
+
+MATCHERS = [
+    Matcher([(Trigram('yes'), Trigram('yes no')), Trigram('yeah')]),
+    LabelMatcher([(Trigram('hello'), 'hi'), (Trigram('bye'), 'bye')]),
+    Matcher([]),
+] + [
+    Matcher([
+        tuple(Trigram(make_text()) for _ in range(random.randint(1, 3)))
+        for _ in range(random.randint(1, 4))
+    ])
+    for _ in range(20)
+]
+
+TRIGRAMS = [Trigram(t) for t in ['yes', 'yes no', 'hello', '', 'yeah']] + [
+    Trigram(make_text()) for _ in range(100)
+]
+
+
+def test_python():
+    matrix = py_similarity_matrix(TRIGRAMS, MATCHERS)
+
+    assert matrix[0][:3] == [1., 0., 0]
+    assert matrix[1][0] == MATCHERS[0] % TRIGRAMS[1]
+    assert matrix[2][1] == 1.
+
+
+def test_numpy_identical():
+    pytest.importorskip('numpy')
+
+    expected = py_similarity_matrix(TRIGRAMS, MATCHERS)
+    matrix = np_similarity_matrix(TRIGRAMS, MATCHERS)
+
+    assert matrix.shape == (len(TRIGRAMS), len(MATCHERS))
+    assert matrix.tolist() == expected
+    assert similarity_matrix(TRIGRAMS, MATCHERS).tolist() == expected
@@ -0,0 +1,90 @@
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pipeline import (
+    Pipeline,
+    chain_stages,
+    map_stage,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('turtle', 'animal', 'turtle'),
+    Expression('elephant', 'animal', 'elephant'),
+]
+
+TEXTS = [
+    'I like potato salad',
+    'the elephant',
+    'nothing here',
+] * 3
+
+EXPECTED = [
+    ['potato-salad'],
+    ['elephant'],
+    [],
+] * 3
+
+
+def make_throne():
+    return IronThrone([
+        ExpressionPretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ])
+
+
+def values(results):
+    return [sorted(c.value for c in r.claims) for r in results]
+
+
+def test_map_stage_order():
+    with ThreadPoolExecutor(4) as executor:
+        stage = chain_stages(
+            map_stage(lambda x: x * 2),
+            map_stage(lambda x: x + 1, executor, window=3),
+        )
+
+        assert list(stage(range(0, 20))) == [x * 2 + 1 for x in range(0, 20)]
+
+
+def test_sequential():
+    assert values(Pipeline(make_throne())(TEXTS)) == EXPECTED
+
+
+def test_executors():
+    with ThreadPoolExecutor(2) as threads, ProcessPoolExecutor(2) as procs:
+        pipeline = Pipeline(
+            make_throne(),
+            claim_executor=threads,
+            solve_executor=procs,
+            window=4,
+        )
+
+        assert values(pipeline(TEXTS)) == EXPECTED
+
+
+def test_stages_alone():
+    pipeline = Pipeline(make_throne())
+    words = list(pipeline.tokenize()(TEXTS[:2]))
+    claimed = list(pipeline.claim()(words))
+
+    assert [len(w) for w in claimed] == [4, 2]
+    assert claimed[1][1].proofs
@@ -0,0 +1,85 @@
+from time import (
+    monotonic,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pipeline import (
+    Pipeline,
+    Sentence,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+]
+
+PHRASE = 'I like potato salad'
+
+
+def make_throne(**kwargs):
+    return IronThrone([
+        ExpressionPretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ], **kwargs)
+
+
+def test_no_budget():
+    i = make_throne()
+    result = i.get_result(PHRASE)
+
+    assert [c.value for c in result.claims] == ['potato-salad']
+    assert not result.exhausted
+    assert i.stats.exhausted_ratio == .0
+
+
+def test_step_budget():
+    i = make_throne(step_budget=10)
+    result = i.get_result(PHRASE)
+    i.get_entities(PHRASE)
+
+    assert result.exhausted
+    assert i.stats.requests == 2
+    assert i.stats.exhausted_ratio == 1.
+
+
+def test_time_budget():
+    i = make_throne(time_budget=.0)
+    claims, score = i.get_entities(PHRASE)
+
+    assert claims == []
+    assert i.stats.exhausted == 1
+
+
+def test_pipeline_budget_covers_request():
+    throne = make_throne(time_budget=60.)
+    pipeline = Pipeline(throne)
+    sentences = list(pipeline.tokenize()([PHRASE]))
+
+    assert isinstance(sentences[0], Sentence)
+    _, budget = pipeline.remaining_budget(sentences[0])
+    assert 59. < budget < 60.
+
+    # The claim time is taken out of the budget, like in get_result()
+    late = Sentence(throne.tokenize(PHRASE), monotonic() - 60.)
+    claimed = pipeline.cleanup()(pipeline.claim()([late]))
+    result = next(pipeline.solve()(claimed))
+
+    assert result.exhausted
+    assert throne.stats.exhausted_ratio == 1.
+
+    # Words that don't come from the tokenize stage get the whole budget
+    assert pipeline.remaining_budget(throne.tokenize(PHRASE))[1] == 60.
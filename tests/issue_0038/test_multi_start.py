@@ -0,0 +1,64 @@
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from functools import (
+    partial,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.solver import (
+    MultiStartSolver,
+    ParallelTemperingSolver,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('turtle', 'animal', 'turtle'),
+]
+
+PHRASE = 'I like potato salad with turtle'
+
+
+def entities(solver_class):
+    i = IronThrone([
+        ExpressionPretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ], solver_class=solver_class)
+
+    return sorted(c.value for c in i.get_entities(PHRASE)[0])
+
+
+def test_parallel_tempering():
+    assert entities(ParallelTemperingSolver) == ['potato-salad', 'turtle']
+
+
+def test_multi_start():
+    assert entities(partial(MultiStartSolver, starts=3)) == \
+        ['potato-salad', 'turtle']
+
+
+def test_multi_start_processes():
+    with ProcessPoolExecutor(2) as executor:
+        solver_class = partial(
+            MultiStartSolver,
+            starts=2,
+            executor=executor,
+            solver_class=ParallelTemperingSolver,
+        )
+
+        assert entities(solver_class) == ['potato-salad', 'turtle']
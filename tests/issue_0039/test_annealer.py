@@ -0,0 +1,91 @@
+from math import (
+    isclose,
+)
+from threading import (
+    Thread,
+)
+
+import pytest
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.solver import (
+    IronThroneSolver,
+    schedule,
+)
+
+expressions = [
+    Expression('salad', 'food', 'salad'),
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('turtle', 'animal', 'turtle'),
+]
+
+
+def make_throne():
+    return IronThrone([
+        ExpressionPretender(expressions),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ])
+
+
+def test_schedule():
+    table = schedule(100., 1., 1000)
+
+    assert len(table) == 1000
+    assert isclose(table[-1], 1.)
+    assert table[0] < 100.
+    assert all(a > b for a, b in zip(table, table[1:]))
+    assert schedule(100., 1., 1000) is table
+
+    with pytest.raises(ValueError):
+        schedule(100., 0., 1000)
+
+
+def test_move_undo():
+    throne = make_throne()
+    words = throne.cleanup(throne.claim(throne.tokenize('potato salad')))
+    solver = IronThroneSolver(words, throne.constraints)
+
+    for _ in range(0, 100):
+        before = list(solver.state)
+        change = solver.move()
+
+        assert change is not None
+        assert solver.state != before
+
+        solver.undo(change)
+
+        assert solver.state == before
+
+
+def test_no_output(capsys):
+    entities, _ = make_throne().get_entities('I like potato salad with turtle')
+
+    assert sorted(c.value for c in entities) == ['potato-salad', 'turtle']
+
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err == ''
+
+
+def test_thread():
+    out = []
+    throne = make_throne()
+    t = Thread(target=lambda: out.append(throne.get_entities('turtle')))
+    t.start()
+    t.join()
+
+    assert [c.value for c in out[0][0]] == ['turtle']
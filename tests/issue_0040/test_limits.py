@@ -0,0 +1,62 @@
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('saint malo', 'city', 'saint-malo'),
+    Expression('saint denis', 'city', 'saint-denis'),
+    Expression('saint etienne', 'city', 'saint-etienne'),
+    Expression('saint tropez', 'city', 'saint-tropez'),
+    Expression('saint', 'name', 'saint'),
+]
+
+
+def proofs_of(pretender, text):
+    words = list(tokenize(text))
+    pretender.claim(words)
+    return words
+
+
+def test_unlimited():
+    ep = ExpressionPretender(expressions)
+    words = proofs_of(ep, 'saint denis')
+
+    assert len(words[0].proofs) == 5
+    assert ep.stats.dropped_ratio == 0.
+
+
+def test_max_candidates():
+    ep = ExpressionPretender(expressions, max_candidates=2)
+    words = proofs_of(ep, 'saint denis')
+
+    # The complete expression comes first despite equal scores
+    assert [p.claim.value for p in words[0].proofs] == \
+        ['saint-denis', 'saint']
+    assert [p.claim.value for p in words[1].proofs] == ['saint-denis']
+
+    assert ep.stats.sentences == 1
+    assert ep.stats.found == 6
+    assert ep.stats.kept == 3
+    assert ep.stats.truncated_words == 1
+    assert ep.stats.truncated_sentences == 1
+
+
+def test_max_proofs():
+    ep = ExpressionPretender(expressions, max_proofs=3)
+    words = proofs_of(ep, 'saint denis')
+
+    assert sorted(p.claim.value for w in words for p in w.proofs) == \
+        ['saint', 'saint-denis', 'saint-denis']
+
+
+def test_sequence_limits():
+    sp = SequencePretender(expressions, max_candidates=1)
+    words = proofs_of(sp, 'saint tropez')
+
+    assert [p.claim.value for p in words[0].proofs] == ['saint-tropez']
+    assert sp.stats.kept == 2
@@ -0,0 +1,51 @@
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.words import (
+    Word,
+)
+
+expressions = [
+    Expression('Saint Malo', 'city', 'saint-malo'),
+    Expression('saint denis', 'city', 'saint-denis'),
+    Expression('Bourg Saint Maurice', 'city', 'bourg-saint-maurice'),
+]
+
+
+def test_shared_words():
+    a = expressions[0].words[0]
+    b = expressions[1].words[0]
+    c = expressions[2].words[1]
+
+    assert a.trigram is b.trigram is c.trigram
+    assert a.normalized is b.normalized is c.normalized
+    assert a.text == 'Saint'
+    assert Word('saint').trigram is not a.trigram
+
+
+def test_index_tokens():
+    ep = ExpressionPretender(expressions)
+
+    assert ep.index[('s', 'a', 'i')] == ['saint']
+    assert [(m.seq, m.order) for m in ep.vocabulary['saint']] == \
+        [(0, 0), (1, 0), (2, 1)]
+
+    found = sorted(
+        (m.seq, m.order, round(s, 2))
+        for m, s in ep.candidates(Word('sainte'))
+    )
+    assert found == [(0, 0, .62), (1, 0, .62), (2, 1, .62)]
+
+
+def test_shared_token_updates():
+    ep = ExpressionPretender(expressions)
+    ep.remove_expressions(expressions[:2])
+
+    assert ep.index[('s', 'a', 'i')] == ['saint']
+    assert 'malo' not in ep.vocabulary
+    assert ('m', 'a', 'l') not in ep.index
+
+    ep.remove_expressions(expressions[2:])
+
+    assert ep.index == {}
@@ -0,0 +1,73 @@
+from iron_throne.columns import (
+    ClaimColumns,
+)
+from iron_throne.constraints import (
+    FullMatches,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('salad', 'food', 'salad'),
+    Expression('bora bora', 'island', 'bora-bora'),
+    Expression('salad potato salad', 'food', 'weird'),
+    Expression('the big apple', 'city', 'new-york'),
+]
+
+TEXTS = [
+    'potato salad',
+    'salad potato',
+    'bora bora bora',
+    'salad potato salad the apple',
+    'the big salad potatoes salad',
+]
+
+
+def claimed(pretender, text, cleanup):
+    words = list(tokenize(text))
+    pretender.claim(words)
+
+    if cleanup:
+        FullMatches().cleanup(words)
+
+    return [
+        [(p.claim.value, p.claim.score, p.order, p.score) for p in w.proofs]
+        for w in words
+    ]
+
+
+def test_same_as_cleanup():
+    for cls in [ExpressionPretender, SequencePretender]:
+        plain = cls(expressions)
+        columnar = cls(expressions, constraints=[FullMatches()])
+
+        for text in TEXTS:
+            assert claimed(columnar, text, False) == \
+                claimed(plain, text, True)
+
+
+def test_claim_scores():
+    columns: ClaimColumns[str] = ClaimColumns(list(tokenize('a b')))
+    a = columns.claim_id('a', 2)
+    b = columns.claim_id('b', 1)
+
+    assert columns.claim_id('a', 2) == a
+
+    columns.append(0, a, 0, 1.)
+    columns.append(1, a, 1, .5)
+    columns.append(1, b, 0, .8)
+
+    assert columns.claim_scores() == [.75, .8]
+
+    selected = columns.select([2])
+
+    assert len(selected) == 1
+    assert list(selected.claims) == [b]
+    assert selected.claim_scores() == [0., .8]
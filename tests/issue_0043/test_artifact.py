@@ -0,0 +1,106 @@
+import gc
+
+import pytest
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.artifact import (
+    FORMAT_VERSION,
+    ArtifactError,
+    compile_model,
+    load_model,
+    read_info,
+)
+from iron_throne.constraints import (
+    AllowedSets,
+    ClaimScores,
+    EntitySet,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+)
+
+PHRASE = 'I like potato salad with turtle'
+
+
+def make_throne():
+    return IronThrone([
+        ExpressionPretender([
+            Expression('salad', 'food', 'salad'),
+            Expression('potato salad', 'food', 'potato-salad'),
+        ], max_candidates=5),
+        SequencePretender([
+            Expression('turtle', 'animal', 'turtle'),
+        ], seq=10),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+        AllowedSets([EntitySet(0, {'food'}, {'animal'})]),
+    ], step_budget=5000)
+
+
+def entities(throne):
+    return sorted(c.value for c in throne.get_entities(PHRASE)[0])
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'model.iron')
+    info = compile_model(make_throne(), path, version='v42')
+
+    assert info.format == FORMAT_VERSION
+    assert read_info(path) == info
+
+    throne = load_model(path)
+
+    assert throne.step_budget == 5000
+    assert throne.pretenders[0].max_candidates == 5
+    assert throne.constraints[3].compiled == \
+        make_throne().constraints[3].compiled
+    assert entities(throne) == ['potato-salad', 'turtle']
+
+    throne.pretenders[1].add_expressions([Expression('fox', 'animal', 'fox')])
+    assert [e.value for e in throne.pretenders[1].expressions] == \
+        ['turtle', 'fox']
+
+
+def test_interned_words(tmp_path):
+    path = str(tmp_path / 'model.iron')
+    compile_model(make_throne(), path)
+    gc.collect()
+
+    throne = load_model(path)
+    loaded = throne.pretenders[0].vocabulary['salad'][0].word
+    added = Expression('salad bowl', 'food', 'salad-bowl').words[0]
+
+    assert loaded.trigram is added.trigram
+    assert loaded.normalized is added.normalized
+
+    # Words loaded while the same words exist share their trigrams too
+    again = load_model(path).pretenders[0].vocabulary['salad'][0].word
+    assert again.trigram is loaded.trigram
+
+
+def test_corrupted(tmp_path):
+    path = tmp_path / 'model.iron'
+    compile_model(make_throne(), str(path))
+
+    data = bytearray(path.read_bytes())
+    data[-10] ^= 0xff
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ArtifactError):
+        load_model(str(path))
+
+
+def test_not_an_artifact(tmp_path):
+    path = tmp_path / 'model.iron'
+    path.write_bytes(b'hello there, this is not a model')
+
+    with pytest.raises(ArtifactError):
+        load_model(str(path))
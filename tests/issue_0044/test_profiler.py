@@ -0,0 +1,136 @@
+import pickle
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from functools import (
+    partial,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    ClaimScores,
+    FullMatches,
+    LargestClaim,
+)
+from iron_throne.pipeline import (
+    Pipeline,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.solver import (
+    IronThroneSolver,
+    MultiStartSolver,
+    ParallelTemperingSolver,
+    Profiler,
+)
+
+PHRASE = 'I like potato salad with turtle'
+
+
+def make_throne(solver_class):
+    return IronThrone([
+        ExpressionPretender([
+            Expression('potato salad', 'food', 'potato-salad'),
+            Expression('turtle', 'animal', 'turtle'),
+        ]),
+    ], [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+    ], solver_class=solver_class)
+
+
+def test_profiler():
+    profiler = Profiler()
+    throne = make_throne(partial(IronThroneSolver, profiler=profiler))
+
+    for _ in range(0, 3):
+        claims, _ = throne.get_entities(PHRASE)
+        assert sorted(c.value for c in claims) == ['potato-salad', 'turtle']
+
+    assert profiler.runs == 3
+    assert profiler.accepted + profiler.rejected == 30000
+    assert profiler.energy_calls == 30003
+    assert set(profiler.timings) == \
+        {'FullMatches', 'LargestClaim', 'ClaimScores'}
+    assert all(t > 0 for t in profiler.timings.values())
+    assert 0 < profiler.acceptance_ratio < 1
+    assert 0 <= profiler.best_step_ratio < 1
+
+    run = profiler.recent[-1]
+    assert len(run.trajectory) == IronThroneSolver.TRAJECTORY_POINTS
+    assert run.trajectory[0][0] == 0
+    assert run.t_max > run.t_min
+
+    report = profiler.report()
+    assert '3 runs, 0 out of budget' in report
+    assert 'FullMatches' in report
+
+
+def test_parallel_tempering():
+    profiler = Profiler()
+    throne = make_throne(partial(ParallelTemperingSolver, profiler=profiler))
+    throne.get_entities(PHRASE)
+
+    assert profiler.runs == 1
+    assert profiler.recent[0].trajectory
+
+
+def test_not_profiled():
+    solver = IronThroneSolver([], [])
+
+    assert solver.timings is None
+    assert solver.trajectory is None
+
+
+def test_copy():
+    profiler = Profiler()
+    copy = pickle.loads(pickle.dumps(profiler))
+
+    assert copy.remote
+    assert copy.key == profiler.key
+
+    # Copies don't aggregate, the profiles are forwarded to the original
+    throne = make_throne(partial(IronThroneSolver, profiler=copy))
+    result = throne.get_result(PHRASE)
+
+    assert result.profile.profiler == profiler.key
+    assert copy.runs == 0
+    assert profiler.runs == 1
+
+
+def test_process_pool():
+    profiler = Profiler()
+    throne = make_throne(partial(IronThroneSolver, profiler=profiler))
+
+    with ProcessPoolExecutor(1) as executor:
+        pipeline = Pipeline(throne, solve_executor=executor)
+        results = list(pipeline([PHRASE, PHRASE]))
+
+    assert all(r.profile is not None for r in results)
+    assert profiler.runs == 2
+    assert set(profiler.timings) == \
+        {'FullMatches', 'LargestClaim', 'ClaimScores'}
+
+    # In-process runs are recorded directly
+    assert throne.get_result(PHRASE).profile is None
+    assert profiler.runs == 3
+
+
+def test_multi_start_process_pool():
+    profiler = Profiler()
+
+    with ProcessPoolExecutor(1) as executor:
+        throne = make_throne(partial(
+            MultiStartSolver,
+            starts=2,
+            executor=executor,
+            solver_class=partial(IronThroneSolver, profiler=profiler),
+        ))
+        throne.get_result(PHRASE)
+
+    assert profiler.runs == 2
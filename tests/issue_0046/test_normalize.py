@@ -0,0 +1,60 @@
+from random import (
+    Random,
+)
+
+from unidecode import (
+    unidecode,
+)
+
+from iron_throne.trigram import (
+    RE_WHITESPACES,
+    normalize,
+)
+
+
+def reference(string):
+    string = string.lower()
+    string = unidecode(string)
+    return RE_WHITESPACES.sub(' ', string).strip()
+
+
+SAMPLES = [
+    '',
+    'hello',
+    'Hello',
+    'HELLO_WORLD',
+    'potato salad',
+    ' potato salad',
+    'potato  salad ',
+    'potato_salad',
+    '  La Rochelle  ',
+    "l'île-d'Yeu",
+    'Crème Brûlée',
+    'Straße',
+    'Æsir Œuvre',
+    '«quoted» text!',
+    'Брюле',
+    'Ǆemal',
+    'İstanbul',
+    '42',
+    '\xa0non\xa0breaking\xa0',
+    '日本語',
+]
+
+
+def test_samples():
+    for sample in SAMPLES:
+        assert normalize(sample) == reference(sample), sample
+
+
+def test_random():
+    random = Random(42)
+    alphabet = [chr(c) for c in range(0x20, 0x250)] + list('Брюле日本 ')
+    alphabet += list('ab   ')
+
+    for _ in range(0, 2000):
+        sample = ''.join(
+            random.choice(alphabet)
+            for _ in range(0, random.randint(0, 12))
+        )
+        assert normalize(sample) == reference(sample), sample
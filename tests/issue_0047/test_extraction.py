@@ -0,0 +1,63 @@
+from random import (
+    Random,
+)
+
+from iron_throne.trigram import (
+    Trigram,
+    bulk_codes,
+    bulk_trigrams,
+    encode_trigram,
+    extract_codes,
+    extract_trigrams,
+    make_trigrams,
+    make_words,
+    normalize,
+)
+
+
+def reference(string):
+    return set(
+        t
+        for w in make_words(normalize(string))
+        for t in make_trigrams(w)
+    )
+
+
+def samples():
+    random = Random(42)
+    alphabet = 'abcdef éèБр日 -'
+
+    yield from ['', 'a', 'ab', 'hello world', '  spaced  out ', 'Crème']
+
+    for _ in range(0, 500):
+        yield ''.join(
+            random.choice(alphabet)
+            for _ in range(0, random.randint(0, 15))
+        )
+
+
+def test_same_trigrams():
+    for sample in samples():
+        expected = reference(sample)
+        norm = normalize(sample)
+
+        assert extract_trigrams(norm) == expected, sample
+        assert extract_codes(norm) == \
+            set(encode_trigram(t) for t in expected), sample
+
+
+def test_trigram_object():
+    t = Trigram('Crème brûlée')
+
+    assert t._trigrams == reference('Crème brûlée')
+    assert set(t.codes) == set(encode_trigram(x) for x in t._trigrams)
+
+
+def test_bulk():
+    tokens = ['saint', 'malo', 'Saint', 'denis', 'saint']
+    trigrams = bulk_trigrams(tokens)
+    codes = bulk_codes(tokens)
+
+    assert trigrams == [reference(t) for t in tokens]
+    assert trigrams[0] is trigrams[2] is trigrams[4]
+    assert codes[1] == extract_codes('malo')
@@ -0,0 +1,150 @@
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.claim import (
+    Claim,
+    Proof,
+)
+from iron_throne.constraints import (
+    AllowedSets,
+    ClaimScores,
+    EntitySet,
+    FullMatches,
+    LargestClaim,
+    prune,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+)
+from iron_throne.solver import (
+    IronThroneSolver,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('hello', 'greeting', 'hello'),
+    Expression('the very big apple', 'city', 'new-york'),
+]
+
+
+def make_constraints():
+    return [
+        FullMatches(),
+        LargestClaim(),
+        ClaimScores(),
+        AllowedSets([EntitySet(0, {'food'}, set())]),
+    ]
+
+
+def make_throne(prune=True, expressions=expressions):
+    return IronThrone([
+        ExpressionPretender(expressions),
+    ], make_constraints(), prune=prune)
+
+
+def claims_of(words):
+    return sorted(set(p.claim.value for w in words for p in w.proofs))
+
+
+def test_never_allowed():
+    throne = make_throne()
+    words = throne.tokenize('hello potato salad')
+    throne.cleanup(throne.claim(words))
+
+    assert claims_of(words) == ['potato-salad']
+
+    claims, score = throne.get_entities('hello potato salad')
+    assert [c.value for c in claims] == ['potato-salad']
+    assert score == 1.
+
+
+def test_too_costly():
+    """
+    Removing a long claim with a high score could increase the energy, so
+    it's kept even though its entity is never allowed.
+    """
+
+    throne = make_throne()
+    words = throne.tokenize('the very big apple')
+    throne.cleanup(throne.claim(words))
+
+    assert claims_of(words) == ['new-york']
+
+
+def test_no_score():
+    words = list(tokenize('foo bar'))
+    empty = Claim('thing', 'empty', score=0., length=1, seq=0)
+    good = Claim('thing', 'good', score=.8, length=1, seq=1)
+    Proof.attach(0, empty, words[0], 0.)
+    Proof.attach(0, good, words[1], .8)
+
+    prune(words, [FullMatches(), ClaimScores()])
+
+    assert claims_of(words) == ['good']
+    assert empty.proofs == []
+
+
+def test_unknown_cost():
+    """
+    AllowedSets can't tell what happens when a needed entity is removed.
+    """
+
+    words = list(tokenize('foo'))
+    claim = Claim('food', 'empty', score=0., length=1, seq=0)
+    Proof.attach(0, claim, words[0], 0.)
+
+    prune(words, [ClaimScores(), AllowedSets([EntitySet(0, {'food'}, set())])])
+
+    assert claims_of(words) == ['empty']
+
+
+def solver_energy(throne, text, values):
+    """
+    Energy that the solver gives, on the claims of the sentence before
+    pruning, to the state which has the claims of the given values.
+    """
+
+    words = throne.tokenize(text)
+    throne.claim(words)
+
+    for constraint in throne.constraints:
+        constraint.cleanup(words)
+
+    solver = IronThroneSolver(words, throne.constraints)
+    solver.configure()
+    solver.state = [
+        next(
+            (i for i, p in enumerate(w.proofs) if p.claim.value in values),
+            None,
+        )
+        for w in words
+    ]
+
+    return solver.energy()
+
+
+def test_not_pruned_by_default():
+    """
+    Pruning ignores the bonus the solver adds for energies outside of their
+    bounds, so it can remove claims of the optimal state.
+    """
+
+    catalog = [
+        Expression('paris', 'city', 'paris'),
+        Expression('ham', 'food', 'ham'),
+    ]
+    text = 'I go to paris'
+    default = make_throne(False, catalog)
+    pruned = make_throne(True, catalog)
+
+    values = [c.value for c in default.get_entities(text)[0]]
+    pruned_values = [c.value for c in pruned.get_entities(text)[0]]
+
+    assert values == ['paris']
+    assert pruned_values == []
+    assert solver_energy(default, text, values) < \
+        solver_energy(default, text, pruned_values)
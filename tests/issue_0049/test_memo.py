@@ -0,0 +1,116 @@
+import gc
+import pickle
+import weakref
+
+from iron_throne.cache import (
+    LRUCache,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression('potato salad', 'food', 'potato-salad'),
+    Expression('cheese', 'food', 'cheese'),
+    Expression('saint malo', 'city', 'saint-malo'),
+]
+
+
+def proofs_of(pretender, text):
+    words = list(tokenize(text))
+    pretender.claim(words)
+    return [
+        sorted((p.claim.value, p.order, p.score) for p in w.proofs)
+        for w in words
+    ]
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.hit_ratio == .75
+
+
+def test_lru_cache_bytes():
+    cache = LRUCache(10, max_bytes=100)
+    cache.put('a', 1, 60)
+    cache.put('b', 2, 30)
+    cache.put('c', 3, 30)
+
+    assert len(cache) == 2
+    assert cache.bytes == 60
+    assert cache.get('a') is None
+
+    cache.put('d', 4, 200)
+    assert cache.get('d') is None
+    assert cache.bytes == 60
+
+
+def test_same_claims():
+    plain = ExpressionPretender(expressions)
+    memo = ExpressionPretender(expressions, cache_size=10)
+
+    for text in ['potato slad and cheese', 'cheeze', 'potato slad']:
+        assert proofs_of(memo, text) == proofs_of(plain, text)
+
+    # Both "potato" and "slad" were already seen
+    assert memo.cache.hits == 2
+    assert len(memo.cache) == 5
+
+
+def test_invalidated_by_update():
+    ep = ExpressionPretender(expressions, cache_size=10)
+    assert proofs_of(ep, 'ham') == [[]]
+
+    ep.add_expressions([Expression('ham', 'food', 'ham')])
+    assert proofs_of(ep, 'ham') == [[('ham', 0, 1.)]]
+
+    ep.remove_expressions([Expression('ham', 'food', 'ham')])
+    assert proofs_of(ep, 'ham') == [[]]
+
+
+def test_snapshots_released():
+    ep = ExpressionPretender(expressions, cache_size=10)
+    proofs_of(ep, 'potato slad')
+    first = weakref.ref(ep.snapshot)
+
+    for i in range(0, 5):
+        ep.add_expressions([Expression(f'dish {i}', 'food', i)])
+
+    gc.collect()
+
+    assert first() is None
+    assert len(ep.cache) == 0
+
+
+def test_sequence_pretender():
+    plain = SequencePretender(expressions)
+    memo = SequencePretender(expressions, cache_size=10)
+
+    for text in ['saint malo cheeze', 'saint mallo cheeze']:
+        assert proofs_of(memo, text) == proofs_of(plain, text)
+
+    assert memo.cache.hits == 1
+
+
+def test_pickle():
+    ep = ExpressionPretender(expressions, cache_size=10, cache_bytes=10000)
+    proofs_of(ep, 'cheese')
+    copy = pickle.loads(pickle.dumps(ep))
+
+    assert len(copy.cache) == 0
+    assert copy.cache.max_bytes == 10000
+    assert proofs_of(copy, 'cheese') == [[('cheese', 0, 1.)]]
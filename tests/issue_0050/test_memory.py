@@ -0,0 +1,180 @@
+from pytest import (
+    raises,
+)
+
+from iron_throne import (
+    IronThrone,
+)
+from iron_throne.constraints import (
+    FullMatches,
+)
+from iron_throne.memory import (
+    Footprint,
+    MemoryBudgetError,
+    add_footprints,
+    deep_size,
+)
+from iron_throne.pretenders import (
+    Expression,
+    ExpressionPretender,
+    SequencePretender,
+    ShortWordPretender,
+)
+from iron_throne.words import (
+    tokenize,
+)
+
+expressions = [
+    Expression(f'{street} {kind}', 'street', i)
+    for i, (street, kind) in enumerate(
+        (s, k)
+        for s in ['victor hugo', 'jean jaures', 'pasteur', 'gambetta']
+        for k in ['street', 'avenue', 'boulevard', 'square']
+    )
+]
+
+syllables = ['sa', 'int', 'mar', 'tin', 'sur', 'be', 'au', 'mont', 'ro']
+
+catalog = [
+    Expression(f'{a}{b}{c} {c}{b} {a}', 'city', i)
+    for i, (a, b, c) in enumerate(
+        (a, b, c)
+        for a in syllables
+        for b in syllables
+        for c in syllables
+    )
+]
+
+
+def test_deep_size():
+    shared = 'x' * 100
+    seen = set()
+    first = deep_size([shared, shared], seen)
+
+    assert first > 100
+    assert deep_size([shared], seen) < 100
+
+
+def test_add_footprints():
+    total = add_footprints([Footprint(1, 2, 3, 4, 5), Footprint(postings=1)])
+
+    assert total == Footprint(2, 2, 3, 4, 5)
+    assert total.total == 16
+    assert total.index == 11
+    assert add_footprints([]) == Footprint()
+
+
+def test_footprint():
+    small = ExpressionPretender(expressions[:4]).footprint()
+    big = ExpressionPretender(expressions).footprint()
+
+    assert all(size > 0 for size in small[:4])
+    assert all(b > s for b, s in zip(big[:4], small[:4]))
+    assert big.cache == 0
+    assert 'trigrams' in big.report()
+
+
+def test_footprint_cache():
+    ep = ExpressionPretender(expressions, cache_size=10)
+    ep.claim(list(tokenize('victor hugo')))
+
+    assert ep.footprint().cache == ep.cache.bytes > 0
+
+
+def test_throne_shares_objects():
+    ep = ExpressionPretender(expressions)
+    sp = SequencePretender(expressions)
+    throne = IronThrone([ep, sp], [FullMatches()])
+    footprint = throne.footprint()
+
+    # The expressions, words and trigrams are counted once
+    assert footprint.trigrams == ep.footprint().trigrams
+    assert footprint.words == ep.footprint().words
+    assert footprint.postings > ep.footprint().postings
+
+
+def test_budget_exceeded():
+    ep = ExpressionPretender(expressions, memory_budget=10 ** 9)
+    size = ep.index_size(ep.snapshot)
+    ep = ExpressionPretender(expressions[:4], memory_budget=size // 2)
+
+    with raises(MemoryBudgetError):
+        ep.add_expressions(expressions[4:])
+
+    # Nothing was added
+    assert ep.expressions == expressions[:4]
+
+
+def test_budget_pruning():
+    ep = ExpressionPretender(expressions, memory_budget=10 ** 9)
+    budget = ep.index_size(ep.snapshot) - 1000
+    ep = ExpressionPretender(
+        expressions,
+        memory_budget=budget,
+        prune_trigrams=True,
+    )
+
+    assert ep.index_size(ep.snapshot) <= budget
+    assert ep.snapshot.stop_trigrams
+    assert not ep.snapshot.stop_trigrams & set(ep.index)
+
+    # Exact matches still work
+    words = list(tokenize('pasteur square'))
+    ep.claim(words)
+    assert {p.claim.value for p in words[0].proofs} == {8, 9, 10, 11}
+
+    # Stop trigrams are not indexed again
+    ep.add_expressions([Expression('gare', 'street', 16)])
+    assert not ep.snapshot.stop_trigrams & set(ep.index)
+
+
+def test_budget_unreachable():
+    with raises(MemoryBudgetError):
+        ExpressionPretender(
+            expressions,
+            memory_budget=1000,
+            prune_trigrams=True,
+        )
+
+
+def test_index_size():
+    for cls in [ExpressionPretender, ShortWordPretender, SequencePretender]:
+        ep = cls(catalog[:500], memory_budget=10 ** 9)
+
+        for expression in catalog[500:600]:
+            ep.add_expressions([expression])
+
+        ep.remove_expressions(catalog[:100])
+
+        size = ep.index_size(ep.snapshot)
+        assert abs(size - ep.footprint().index) < size * .01
+
+        # Only the empty dictionaries are left
+        ep.remove_expressions(catalog)
+        assert ep.snapshot.size == 0
+
+
+def test_budget_does_not_walk():
+    def fail(*args, **kwargs):
+        assert False
+
+    ep = ExpressionPretender(catalog[:500], memory_budget=10 ** 9)
+    ep.footprint = fail
+    ep.add_expressions(catalog[500:])
+
+    assert len(ep.expressions) == len(catalog)
+
+
+def test_pruning_is_proportional():
+    ep = ExpressionPretender(catalog, memory_budget=10 ** 9)
+    size = ep.index_size(ep.snapshot)
+    trigrams = len(ep.index)
+    budget = size - size // 200
+    ep = ExpressionPretender(
+        catalog,
+        memory_budget=budget,
+        prune_trigrams=True,
+    )
+
+    assert budget - size // 200 < ep.index_size(ep.snapshot) <= budget
+    assert len(ep.snapshot.stop_trigrams) < trigrams * .1